@@ -0,0 +1,104 @@
+"""Convergence of the qlearning with the maximum q value of the next state as bootstrap (AgentQLearning.get_qvalue_max)
+compared with the legacy bootstrap, that used the best action of the next state as if it were its value.
+The quality of the agents is the fraction of boards where they perform an optimal movement (see Solver.evaluate_agent).
+Run it from the root folder of the project:
+
+    python benchmarks/convergence.py                    # prints the comparison
+    python benchmarks/convergence.py --check            # exits with 1 if the bootstrap does not converge faster
+    python benchmarks/convergence.py --json report.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import Solver
+import Training
+from AgentQLearning import AgentQLearning
+from QTable import QTable
+
+class LegacyAgent(AgentQLearning):
+    """An agent with the legacy bootstrap: get_qvalue_max returns the best action instead of its q value."""
+
+    def get_qvalue_max(self, board):
+        action, _ = self.get_best_action_value(board)
+        return 0 if action is None else action
+
+AGENTS = {
+    'max value': AgentQLearning,
+    'legacy argmax': LegacyAgent,
+}
+
+def learning_curve(agent_class, episodes, interval, seed):
+    """Trains an agent and measures its quality every interval episodes.
+
+    Returns
+    -------
+    list of (int, float)
+        The episodes played and the fraction of optimal movements
+    """
+    random.seed(seed)
+    player = agent_class(Q_table=QTable())
+    curve = []
+    for played in range(interval, episodes + 1, interval):
+        Training.train(player, played, first_episode=played - interval)
+        curve.append((played, Solver.evaluate_agent(player)))
+    return curve
+
+def episodes_to_target(curve, target):
+    """Gets the first number of episodes where the quality reaches the target (None if it is never reached)."""
+    for played, quality in curve:
+        if quality >= target:
+            return played
+    return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convergence of the qlearning bootstrap')
+    parser.add_argument('--episodes', type=int, default=50000, help='Episodes of training of each agent')
+    parser.add_argument('--interval', type=int, default=5000, help='Episodes between measures')
+    parser.add_argument('--seeds', type=int, default=3, help='Number of trainings of each agent (seeds 0, 1...)')
+    parser.add_argument('--target', type=float, default=0.85, help='Fraction of optimal movements to reach')
+    parser.add_argument('--check', action='store_true', help='Exit with 1 if the max value bootstrap is not faster and better')
+    parser.add_argument('--json', default=None, help='File where writes the results')
+    args = parser.parse_args(argv)
+
+    Solver.solve()
+    report = {'episodes': args.episodes, 'interval': args.interval, 'target': args.target, 'agents': {}}
+    print('{:<15} {:>8} {:>16} {:>16}'.format('agent', 'seed', 'final optimal', 'episodes target'))
+    for name, agent_class in AGENTS.items():
+        runs = []
+        for seed in range(args.seeds):
+            curve = learning_curve(agent_class, args.episodes, args.interval, seed)
+            reached = episodes_to_target(curve, args.target)
+            runs.append({'seed': seed, 'curve': curve, 'episodes_to_target': reached})
+            print('{:<15} {:>8} {:>15.2%} {:>16}'.format(name, seed, curve[-1][1], reached if reached is not None else '-'))
+        finals = [run['curve'][-1][1] for run in runs]
+        reached = [run['episodes_to_target'] for run in runs]
+        report['agents'][name] = {
+            'runs': runs,
+            'mean_final_optimal': sum(finals)/len(finals),
+            # Runs that never reach the target count as twice the episodes
+            'mean_episodes_to_target': sum(value if value is not None else 2*args.episodes for value in reached)/len(reached),
+        }
+
+    print()
+    for name, result in report['agents'].items():
+        print('{:<15} mean final optimal {:.2%}, mean episodes to {:.0%}: {:.0f}'.format(
+            name, result['mean_final_optimal'], args.target, result['mean_episodes_to_target']))
+
+    if args.json:
+        with open(args.json, 'w') as handle:
+            json.dump(report, handle, indent=2)
+
+    if args.check:
+        fixed, legacy = report['agents']['max value'], report['agents']['legacy argmax']
+        if fixed['mean_episodes_to_target'] >= legacy['mean_episodes_to_target'] or fixed['mean_final_optimal'] <= legacy['mean_final_optimal']:
+            print('The max value bootstrap does not converge faster than the legacy bootstrap')
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+"""Micro-benchmarks of the hot paths of the game and the training. Run them from the root folder of the project:
+
+    python benchmarks/hot_paths.py                  # compares with the first recorded time of each benchmark
+    python benchmarks/hot_paths.py --save user-030  # records the results as a new entry of benchmarks/baseline.json
+    python benchmarks/hot_paths.py --against user-023 -k movement
+    python benchmarks/hot_paths.py -k step          # only the benchmarks whose name contains 'step'
+
+Each result is the best time per operation (in microseconds) of several repetitions. The baseline file keeps
+one entry per recording (key: label, value: the recorded times), so the later entries never replace the
+original measures.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import Constants
+import Training
+from AgentQLearning import AgentQLearning
+from QTable import read_table, write_table
+from ReplayBuffer import ReplayBuffer
+from TicTacToe import TicTacToe
+from TicTacToeBitboard import TicTacToeBitboard
+from TicTacToeCompact import TicTacToeCompact
+from TicTacToeNxN import TicTacToeNxN
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# A game that finishes with a tie (9 movements)
+TIE_GAME = [0, 4, 8, 2, 6, 3, 5, 7, 1]
+# Boards in the middle of a game
+BOARDS = [[1, 0, 0, 0, 2, 0, 0, 0, 1], [1, 2, 0, 0, 1, 0, 2, 0, 0], [0, 0, 0, 0, 1, 0, 0, 0, 0]]
+
+def _game(game_class):
+    def run():
+        game = game_class()
+        for action in TIE_GAME:
+            game.step(action)
+    return run, len(TIE_GAME)
+
+def _reused_game(game):
+    def run():
+        game.reset()
+        for action in TIE_GAME:
+            game.step(action)
+    return run, len(TIE_GAME)
+
+def _check_win(game_class):
+    game = game_class()
+    for action in TIE_GAME[:6]:
+        game.step(action)
+    return game._check_win, 1
+
+def _episode(agent):
+    return lambda: Training.run_episode(agent), 1
+
+def _replay(agent):
+    replay = ReplayBuffer(seed=0)
+    for _ in range(100):
+        Training.run_episode(agent, replay=replay)
+    return lambda: replay.replay(agent), replay.batch_size
+
+def _movement_batch(agent, size=1024):
+    boards = [BOARDS[i % len(BOARDS)] for i in range(size)]
+    return lambda: agent.movement_batch(boards), size
+
+def _pickle_store(agent, directory):
+    file = os.path.join(directory, 'qtable.pickle')
+    return lambda: write_table(agent.Q_table, file), 1
+
+def _pickle_load(agent, directory):
+    file = os.path.join(directory, 'qtable_load.pickle')
+    write_table(agent.Q_table, file)
+    return lambda: read_table(file), 1
+
+def _binary_store(agent, directory):
+    file = os.path.join(directory, 'qtable' + Constants.QTABLE_BINARY_EXTENSION)
+    return lambda: write_table(agent.Q_table, file), 1
+
+def _binary_load(agent, directory):
+    file = os.path.join(directory, 'qtable_load' + Constants.QTABLE_BINARY_EXTENSION)
+    write_table(agent.Q_table, file)
+    return lambda: read_table(file), 1
+
+def build_cases(agent, directory):
+    """Builds the benchmarks.
+
+    Returns
+    -------
+    dict
+        - Key: name of the benchmark
+        - Value: (function to time, number of operations of each call)
+    """
+    return {
+        'TicTacToe.step': _game(TicTacToe),
+        'TicTacToeBitboard.step': _game(TicTacToeBitboard),
+        'TicTacToeCompact.step': _game(TicTacToeCompact),
+        'TicTacToeCompact.step no copy': _reused_game(TicTacToeCompact(copy=False)),
+        'TicTacToeNxN.step': _game(TicTacToeNxN),
+        'TicTacToeNxN.step 5x5': _game(lambda: TicTacToeNxN(5, 5, 4)),
+        'TicTacToe._check_win': _check_win(TicTacToe),
+        'TicTacToeBitboard._check_win': _check_win(TicTacToeBitboard),
+        'TicTacToeCompact._check_win': _check_win(TicTacToeCompact),
+        'AgentQLearning._convert_state': (lambda: [agent._convert_state(board) for board in BOARDS], len(BOARDS)),
+        'AgentQLearning._get_free_positions': (lambda: [agent._get_free_positions(board) for board in BOARDS], len(BOARDS)),
+        'AgentQLearning.movement': (lambda: [agent.movement(board) for board in BOARDS], len(BOARDS)),
+        'AgentQLearning.movement_batch': _movement_batch(agent),
+        'AgentQLearning.get_qvalue': (lambda: [agent.get_qvalue(board, 2) for board in BOARDS], len(BOARDS)),
+        'AgentQLearning.update_qvalue': (lambda: [agent.update_qvalue(1.0, board, 2) for board in BOARDS], len(BOARDS)),
+        'Training.run_episode': _episode(agent),
+        'ReplayBuffer.replay': _replay(agent),
+        'pickle store': _pickle_store(agent, directory),
+        'pickle load': _pickle_load(agent, directory),
+        'binary store': _binary_store(agent, directory),
+        'binary load': _binary_load(agent, directory),
+    }
+
+def measure(function, operations, repeat=5, min_time=0.2):
+    """Measures the best time per operation of a function.
+
+    Params:
+    ----------
+    function : callable
+        The function to time
+    operations : int
+        Number of operations of each call
+    repeat : int
+        Number of repetitions
+    min_time : float
+        Minimum time (seconds) of each repetition
+
+    Returns
+    -------
+    float
+        The time per operation in microseconds
+    """
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    number = max(1, int(number*min_time/0.2))
+    return min(timer.repeat(repeat=repeat, number=number))/number/operations*1e6
+
+def read_baseline(file):
+    """Reads the entries of the baseline file.
+
+    Params:
+    ----------
+    file : str
+        The baseline file
+
+    Returns
+    -------
+    dict
+        Key: label of the entry. Value: dict with the recorded times (a file of the old format, with only
+        the times, is one entry labelled 'baseline')
+    """
+    if not os.path.exists(file):
+        return {}
+    with open(file) as handle:
+        entries = json.load(handle)
+    if entries and not isinstance(next(iter(entries.values())), dict):
+        entries = {'baseline': entries}
+    return entries
+
+def select_baseline(entries, label=None):
+    """Gets the times to compare with.
+
+    Params:
+    ----------
+    entries : dict
+        The entries of the baseline file (see read_baseline)
+    label : str or None
+        The label of the entry. If it is None, the first recorded time of each benchmark is used
+
+    Returns
+    -------
+    dict
+        Key: name of the benchmark. Value: time in microseconds
+    """
+    if label is not None:
+        if label not in entries:
+            raise SystemExit('Unknown baseline entry: ' + label)
+        return entries[label]
+    baseline = {}
+    for times in entries.values():
+        for name, value in times.items():
+            baseline.setdefault(name, value)
+    return baseline
+
+def compare(results, baseline, threshold):
+    """Prints the comparison of the results with the baseline.
+
+    Returns
+    -------
+    list of str
+        The names of the benchmarks that are slower than the baseline by more than threshold
+    """
+    regressions = []
+    print('{:<38} {:>12} {:>12} {:>8}'.format('benchmark', 'baseline us', 'current us', 'ratio'))
+    for name, value in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print('{:<38} {:>12} {:>12.3f} {:>8}'.format(name, '-', value, '-'))
+            continue
+        ratio = value/base
+        mark = ''
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            mark = ' slower'
+        elif ratio < 1 - threshold:
+            mark = ' faster'
+        print('{:<38} {:>12.3f} {:>12.3f} {:>7.2f}x{}'.format(name, base, value, ratio, mark))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Micro-benchmarks of the hot paths')
+    parser.add_argument('-k', dest='filter', default='', help='Only run the benchmarks whose name contains this text')
+    parser.add_argument('--save', default=None, metavar='LABEL', help='Record the results as a new entry of the baseline')
+    parser.add_argument('--against', default=None, metavar='LABEL', help='Compare with an entry of the baseline (the first recorded times if it is not set)')
+    parser.add_argument('--baseline', default=BASELINE_FILE, help='File with the baseline')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Relative slowdown reported as a regression')
+    parser.add_argument('--json', default=None, help='File where writes the results')
+    args = parser.parse_args(argv)
+
+    random.seed(0)
+    agent = AgentQLearning(Q_table=read_table(Constants.QTABLE_FILE))
+    with tempfile.TemporaryDirectory() as directory:
+        cases = build_cases(agent, directory)
+        results = {}
+        for name, (function, operations) in cases.items():
+            if args.filter in name:
+                results[name] = round(measure(function, operations), 3)
+
+    if args.json:
+        with open(args.json, 'w') as handle:
+            json.dump(results, handle, indent=2)
+
+    entries = read_baseline(args.baseline)
+    if args.save:
+        if args.save in entries:
+            raise SystemExit('The baseline entry already exists: ' + args.save)
+        entries[args.save] = results
+        with open(args.baseline, 'w') as handle:
+            json.dump(entries, handle, indent=2)
+            handle.write('\n')
+        print('Baseline entry', args.save, 'written to', args.baseline)
+        return 0
+
+    baseline = select_baseline(entries, args.against)
+    regressions = compare(results, baseline, args.threshold)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
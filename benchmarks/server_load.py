@@ -0,0 +1,100 @@
+"""Load test of the game server (see GameServer): many clients play random games at the same time against
+the AI. The server and the clients run in the same process. Run it from the root folder of the project:
+
+    python benchmarks/server_load.py --sessions 2000 --connections 20
+    python benchmarks/server_load.py --window-ms 0     # without waiting for other movements
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from GameServer import GameServer
+from TableRegistry import get_agent
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction*len(values)))]
+
+async def play_games(host, port, games, rng, latencies):
+    """Plays games on a connection, all of them at the same time (pipelined requests)."""
+    reader, writer = await asyncio.open_connection(host, port)
+    pending = {}    # Key: id of the request. Value: future of the response
+    ids = iter(range(1, 1 << 62))
+
+    async def read_responses():
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            response = json.loads(line)
+            pending.pop(response['id']).set_result(response)
+
+    async def request(message):
+        message['id'] = next(ids)
+        future = asyncio.get_running_loop().create_future()
+        pending[message['id']] = future
+        writer.write(json.dumps(message).encode() + b'\n')
+        start = time.perf_counter()
+        response = await future
+        latencies.append(time.perf_counter() - start)
+        return response
+
+    async def play_game():
+        response = await request({'cmd': 'new', 'side': rng.choice('XO')})
+        while not response['done']:
+            position = rng.choice([pos for pos, value in enumerate(response['board']) if value == 0])
+            response = await request({'cmd': 'move', 'session': response['session'], 'position': position})
+        await request({'cmd': 'close', 'session': response['session']})
+
+    reader_task = asyncio.ensure_future(read_responses())
+    await asyncio.gather(*(play_game() for _ in range(games)))
+    writer.close()
+    reader_task.cancel()
+
+async def run(args):
+    agent = get_agent()
+    game_server = GameServer(agent, args.window_ms/1000, args.max_batch)
+    server = await game_server.start('127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    rng = random.Random(args.seed)
+    latencies = []
+    games = [args.sessions//args.connections + (1 if i < args.sessions % args.connections else 0) for i in range(args.connections)]
+
+    start = time.perf_counter()
+    await asyncio.gather(*(play_games('127.0.0.1', port, count, rng, latencies) for count in games))
+    seconds = time.perf_counter() - start
+    stats = game_server.stats()
+    server.close()
+    await server.wait_closed()
+    return {
+        'sessions': args.sessions,
+        'connections': args.connections,
+        'window_ms': args.window_ms,
+        'requests': len(latencies),
+        'seconds': round(seconds, 3),
+        'requests_per_second': round(len(latencies)/seconds, 1),
+        'p50_ms': round(percentile(latencies, 0.5)*1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99)*1000, 3),
+        'max_ms': round(max(latencies)*1000, 3),
+        'ai_moves': stats['moves'],
+        'mean_batch': round(stats['mean_batch'], 1),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test of the game server')
+    parser.add_argument('--sessions', type=int, default=2000, help='Number of games')
+    parser.add_argument('--connections', type=int, default=20, help='Number of connections (the games of a connection are played at the same time)')
+    parser.add_argument('--window-ms', type=float, default=2.0, help='See GameServer.MoveBatcher')
+    parser.add_argument('--max-batch', type=int, default=1024, help='See GameServer.MoveBatcher')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the movements of the clients')
+    args = parser.parse_args(argv)
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+if __name__ == "__main__":
+    main()
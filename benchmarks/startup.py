@@ -0,0 +1,63 @@
+"""Startup time benchmark of the GUI. Run it from the root folder of the project:
+
+    python benchmarks/startup.py
+
+It measures the time to import the game, open the window, load the assets of the
+screens the first time (cold) and the next times (cached, see Assets) and render
+a game. Set SDL_VIDEODRIVER=dummy to run it without a display.
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+def timed(function, *args):
+    """Runs a function and measures its time.
+
+    Returns
+    -------
+    (float, object)
+        The time in milliseconds and the result of the function
+    """
+    start = time.perf_counter()
+    result = function(*args)
+    return (time.perf_counter() - start)*1000, result
+
+def load_screen_assets(Controller, Constants):
+    """Loads the images and fonts used by the main menu and the winner screen."""
+    for path, width, height in [(Constants.IMAGE_PLAY_BUTTON, 330, 80), (Constants.IMAGE_OPTIONS_BUTTON, 420, 80),
+            (Constants.IMAGE_QUIT_BUTTON, 300, 90), (Constants.IMAGE_PLAY_BUTTON, 400, 50), (Constants.IMAGE_PLAY_BUTTON, 420, 80)]:
+        Controller.load_image(path, width, height)
+    for size in (Constants.SIZE_FONT_BIG, 18, 25, 28, 50):
+        Controller.get_font(size, Constants.FONT_GAMES)
+    Controller.Assets.get_background()
+
+def main():
+    results = {}
+    results['import_ms'], Controller = timed(__import__, 'Controller')
+    import Constants
+    import pygame
+    from TicTacToe import TicTacToe
+
+    def open_window():
+        pygame.init()
+        pygame.display.set_icon(Controller.load_image(Constants.IMAGE_LOGO, 256, 256))
+        return pygame.display.set_mode((Constants.SCREEN_WIDTH, Constants.SCREEN_HEIGHT))
+    results['open_window_ms'], screen = timed(open_window)
+
+    Controller.Assets.clear()
+    results['screen_assets_cold_ms'], _ = timed(load_screen_assets, Controller, Constants)
+    results['screen_assets_warm_ms'], _ = timed(load_screen_assets, Controller, Constants)
+
+    game = TicTacToe()
+    results['render_first_ms'], _ = timed(game.render, screen)
+    game.step(4)
+    results['render_next_ms'], _ = timed(game.render, screen)
+
+    pygame.quit()
+    print(json.dumps({name: round(value, 3) for name, value in results.items()}, indent=2))
+
+if __name__ == "__main__":
+    main()
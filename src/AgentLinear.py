@@ -0,0 +1,336 @@
+import random
+
+import numpy as np
+
+import Constants
+from QTable import encode_state, get_powers
+from ReplayBuffer import ReplayBuffer
+from TicTacToeNxN import get_line_table
+
+class AgentLinear:
+    """
+    A class used to represent a AI player whose q values are approximated by a linear function, so it
+    generalizes to boards it has never seen and its memory does not depend on the number of states.
+    It has the same interface as AgentQLearning (movement, get_qvalue, get_qvalue_max, update_qvalue...).
+
+    The features of a movement describe the board after it from the point of view of the player that moves:
+    for each pattern (own parts, other parts) of a winning line, the fraction of lines with that pattern
+    (see TicTacToeNxN.LineTable), and a bias. The q value is the dot product of the features and the weights.
+
+    update_qvalue does not change the weights immediately: it stores the board, the action and the new value
+    in a ReplayBuffer (as a finished transition whose reward is the value) and every train_interval updates
+    the weights are fitted to a random minibatch of the buffer. The boards can have at most 40 positions.
+
+    Attributes:
+    ----------
+    weights : ndarray
+        The weights of the features
+    learning_rate : float
+        The step of the gradient descent
+    replay : ReplayBuffer
+        The samples of the minibatches
+    train_interval : int
+        Number of updates between minibatches
+    """
+
+    def __init__(self, rows=Constants.NUM_ROWS, columns=Constants.NUM_COLUMNS, win_length=Constants.WIN_LENGTH,
+            learning_rate=0.2, batch_size=32, replay_size=10000, train_interval=4, seed=None):
+        """Initializes the weights (zeros) and the replay buffer.
+
+        Params:
+        ----------
+        rows : int
+            Number of rows of the board
+        columns : int
+            Number of columns of the board
+        win_length : int
+            Number of parts in a row needed to win
+        learning_rate : float
+            The step of the gradient descent
+        batch_size : int
+            Number of samples of each minibatch
+        replay_size : int
+            Maximum number of samples of the replay buffer (the oldest are replaced)
+        train_interval : int
+            Number of updates between minibatches
+        seed : int or None
+            The seed of the generator of the minibatches
+        """
+        lines = get_line_table(rows, columns, win_length)
+        self.num_actions = rows*columns
+        self.win_length = win_length
+        self.num_patterns = (win_length + 1)**2
+        self.num_features = self.num_patterns + 1
+        # _lines[i, l] is 1 if the position i belongs to the line l
+        self._lines = np.zeros((self.num_actions, len(lines.lines)), dtype=np.int64)
+        for index, line in enumerate(lines.lines):
+            self._lines[list(line), index] = 1
+
+        # _powers[i] is the digit i of the encoded states (see QTable.encode_state)
+        self._powers = np.array(get_powers(self.num_actions), dtype=np.uint64)
+
+        self.weights = np.zeros(self.num_features)
+        self.learning_rate = learning_rate
+        self.train_interval = train_interval
+        self.replay = ReplayBuffer(replay_size, batch_size, num_cells=self.num_actions, seed=seed)
+        self._updates = 0
+
+    def _features_of(self, board, actions):
+        """Computes the features of some movements on a board.
+
+        Params:
+        ----------
+        board : list of int
+            The current board
+        actions : list of int
+            The positions of the movements
+
+        Returns
+        -------
+        ndarray
+            The features with shape (len(actions), num_features)
+        """
+        board = np.asarray(board)
+        player1 = np.count_nonzero(board == Constants.PLAYER1)
+        player = Constants.PLAYER1 if player1 == np.count_nonzero(board == Constants.PLAYER2) else Constants.PLAYER2
+        own = (board == player).astype(np.int64) @ self._lines
+        other = (board == 3 - player).astype(np.int64) @ self._lines
+
+        # Pattern of each line after each movement
+        patterns = (own + self._lines[actions])*(self.win_length + 1) + other
+        patterns += np.arange(len(actions))[:, None]*self.num_patterns
+        counts = np.bincount(patterns.ravel(), minlength=len(actions)*self.num_patterns)
+
+        features = np.empty((len(actions), self.num_features))
+        features[:, :-1] = counts.reshape(len(actions), self.num_patterns)/self._lines.shape[1]
+        features[:, -1] = 1.0
+        return features
+
+    def _features_of_boards(self, boards, actions):
+        """Computes the features of a movement on each board (see _features_of).
+
+        Params:
+        ----------
+        boards : ndarray
+            The boards with shape (N, rows*columns)
+        actions : list of int or ndarray
+            The position of the movement on each board
+
+        Returns
+        -------
+        ndarray
+            The features with shape (N, num_features)
+        """
+        num_boards = len(boards)
+        player1 = np.count_nonzero(boards == Constants.PLAYER1, axis=1)
+        player2 = np.count_nonzero(boards == Constants.PLAYER2, axis=1)
+        player = np.where(player1 == player2, Constants.PLAYER1, Constants.PLAYER2)[:, None]
+        own = (boards == player).astype(np.int64) @ self._lines
+        other = (boards == 3 - player).astype(np.int64) @ self._lines
+
+        # Pattern of each line after each movement
+        patterns = (own + self._lines[actions])*(self.win_length + 1) + other
+        patterns += np.arange(num_boards)[:, None]*self.num_patterns
+        counts = np.bincount(patterns.ravel(), minlength=num_boards*self.num_patterns)
+
+        features = np.empty((num_boards, self.num_features))
+        features[:, :-1] = counts.reshape(num_boards, self.num_patterns)/self._lines.shape[1]
+        features[:, -1] = 1.0
+        return features
+
+    def _qvalues(self, board, actions):
+        """Gets the q values of some movements (vectorized).
+
+        Returns
+        -------
+        ndarray
+            The q values of the actions
+        """
+        return self._features_of(board, actions) @ self.weights
+
+    def movement(self, board, greedy=0):
+        """Performs a movement.
+
+        Params:
+        ----------
+        board : list of int
+            The current board
+        greedy : int
+            The probability of performing a random movement
+
+        Returns
+        -------
+        int
+            The position on the board where performs a movement
+        """
+        if random.uniform(0,1) < greedy:
+            return self.random_movement(board)
+        positions = self._get_free_positions(board)
+        return positions[int(np.argmax(self._qvalues(board, positions)))]
+
+    def movement_batch(self, boards, greedy=0, rng=None):
+        """Performs a movement on each board (see AgentQLearning.movement_batch).
+
+        Params:
+        ----------
+        boards : ndarray or list of list of int
+            The current boards with shape (N, rows*columns)
+        greedy : float
+            The probability of performing a random movement
+        rng : numpy.random.Generator or None
+            Not used (the random movements use the random module like movement)
+
+        Returns
+        -------
+        ndarray
+            The positions on the boards where performs the movements with shape (N,) (-1 if a board has no free positions)
+        """
+        boards = np.asarray(boards, dtype=np.int64).reshape(-1, self.num_actions).tolist()
+        return np.array([self.movement(board, greedy) if Constants.EMPTY in board else -1 for board in boards], dtype=np.int64)
+
+    def random_movement(self, board):
+        """Performs a random movement.
+
+        Params:
+        ----------
+        board : list of int
+            The current board
+
+        Returns
+        -------
+        int
+            The position on the board where performs a movement
+        """
+        return random.choice(self._get_free_positions(board))
+
+    def _get_free_positions(self, board):
+        """Gets the free positions.
+
+        Params:
+        ----------
+        board : list of int
+            The current board
+
+        Returns
+        -------
+        list of int
+            The positions without parts
+        """
+        return [index for index, value in enumerate(board) if value == Constants.EMPTY]
+
+    def get_qvalue(self, board, action):
+        """Gets the q value.
+
+        Params:
+        ----------
+        board : list of int
+            The current board
+        action : int
+            The position where place the part
+
+        Returns
+        -------
+        float
+            The q value
+        """
+        return float(self._qvalues(board, [action])[0])
+
+    def get_qvalue_max(self, board):
+        """Returns the maximum qvalue for a given state (board)
+
+        Params:
+        ----------
+        board : list of int
+            The current board
+
+        Returns
+        -------
+        float
+            The maximum qvalue (0 if there are no free positions)
+        """
+        return self.get_best_action_value(board)[1]
+
+    def get_best_action_value(self, board):
+        """Gets the free position with the maximum q value and its q value (one evaluation of the features).
+
+        Params:
+        ----------
+        board : list of int
+            The current board
+
+        Returns
+        -------
+        (int or None, float)
+            The position on the board and its q value. (None, 0) if the board has no free positions
+        """
+        positions = self._get_free_positions(board)
+        if not positions:
+            return None, 0.0
+        values = self._qvalues(board, positions)
+        best = int(np.argmax(values))
+        return positions[best], float(values[best])
+
+    def update_qvalue(self, value, board, action):
+        """Stores a new qvalue in the replay buffer and fits the weights to a minibatch every train_interval updates.
+        The value is stored as the reward of a finished transition (see ReplayBuffer.add).
+
+        Params:
+        ----------
+        value : float
+            The new value
+        board : list of int
+            The current board
+        action : int
+            The action to be taken
+        """
+        replay = self.replay
+        replay.add(encode_state(board), action, value, 0, True)
+        self._updates += 1
+        if self._updates % self.train_interval == 0 and len(replay) >= replay.batch_size:
+            self.train_minibatch()
+
+    def train_minibatch(self):
+        """Performs a step of gradient descent of the squared error on a random minibatch of the replay buffer."""
+        replay = self.replay
+        indexes = np.array(replay.sample())
+        states = np.frombuffer(replay.states, dtype=np.uint64)[indexes]
+        boards = (states[:, None]//self._powers % 3).astype(np.int64)
+        actions = np.frombuffer(replay.actions, dtype=np.uint8)[indexes]
+        targets = np.frombuffer(replay.rewards, dtype=np.float32)[indexes]
+        features = self._features_of_boards(boards, actions)
+        errors = targets - features @ self.weights
+        self.weights += self.learning_rate*(errors @ features)/len(indexes)
+
+    def memory_usage(self):
+        """Gets the memory used by the weights and the replay buffer (it does not depend on the number of states).
+
+        Returns
+        -------
+        int
+            The number of bytes
+        """
+        return self.weights.nbytes + self._lines.nbytes + self.replay.memory_usage()
+
+    def write_weights(self, file):
+        """Writes the weights to a file (NumPy format).
+
+        Params:
+        ----------
+        file : str
+            The file where writes the weights
+        """
+        with open(file, 'wb') as handle:
+            np.save(handle, self.weights)
+
+    def read_weights(self, file):
+        """Reads the weights from a file (see write_weights).
+
+        Params:
+        ----------
+        file : str
+            The file where reads the weights
+        """
+        weights = np.load(file)
+        if weights.shape != self.weights.shape:
+            raise ValueError('The weights of {} are not for this board'.format(file))
+        self.weights = weights
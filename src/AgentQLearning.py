@@ -1,6 +1,9 @@
 import random
 import Constants
-import pickle
+
+from QTable import QTable, QTableFormatError, encode_state, legal_mask, read_table, write_table
+from Symmetry import (IDENTITY, INVERSES, TRANSFORMS, WEIGHTS, canonicalize, expand_table, from_canonical_action, reduce_table,
+    to_canonical_action)
 
 class AgentQLearning:
     """
@@ -8,17 +11,31 @@ class AgentQLearning:
 
     Attributes:
     ----------
-    Q_table : dict
-        The q table where it stores the q values.
-            - Key: state
-            - Value: dict
-                - Key: actions
-                - Value: value
+    Q_table : QTable or SparseQTable
+        The q table where it stores the q values. It is indexed by the state
+        (board encoded as a base-3 integer) and the action. Boards bigger than 3x3 need a SparseQTable
+    symmetric : boolean
+        Indicates if the symmetric boards (rotations and reflections) share their q values.
+        In this case the q table only stores the canonical boards (see Symmetry)
     """
 
-    def __init__(self):
-        """Initializes the q table."""
-        self.read_qtable()
+    def __init__(self, symmetric=False, Q_table=None):
+        """Initializes the q table.
+
+        Params:
+        ----------
+        symmetric : boolean
+            Indicates if the symmetric boards share their q values
+        Q_table : QTable or SparseQTable or None
+            The q table to use. If it is None, the q table is read from the file
+        """
+        if symmetric and Q_table is not None and Q_table.num_actions != len(TRANSFORMS[IDENTITY]):
+            raise ValueError('The symmetries are only available for the {} positions board'.format(len(TRANSFORMS[IDENTITY])))
+        self.symmetric = symmetric
+        if Q_table is None:
+            self.read_qtable()
+        else:
+            self.Q_table = Q_table
 
     def movement(self, board, greedy=0):
         """Performs a movement.
@@ -35,11 +52,64 @@ class AgentQLearning:
         int
             The position on the board where performs a movement (0 to 8)
         """
-        state = self._convert_state(board)
+        state, transform = self._convert_state_transform(board)
         rand = random.uniform(0,1)
         if rand < greedy or not state in self.Q_table:
             return self.random_movement(board)
-        return max(self.Q_table[state], key=self.Q_table[state].get)
+        return self._best_action(state, transform, board)
+
+    def movement_batch(self, boards, greedy=0, rng=None):
+        """Performs a movement on each board at once (vectorized with NumPy for a dense q table).
+        Each movement is the same as the movement of movement(board, greedy), except the random ones.
+
+        Params:
+        ----------
+        boards : ndarray or list of list of int
+            The current boards with shape (N, 9)
+        greedy : float
+            The probability of performing a random movement
+        rng : numpy.random.Generator or None
+            The random generator. If it is None, a generator seeded from the random module is used
+
+        Returns
+        -------
+        ndarray
+            The positions on the boards where performs the movements with shape (N,) (-1 if a board has no free positions)
+        """
+        import numpy as np
+        from BatchTrainer import best_actions, encode_states, random_actions, table_arrays
+
+        boards = np.asarray(boards, dtype=np.int64).reshape(-1, self.Q_table.num_actions)
+        if rng is None:
+            rng = np.random.default_rng(random.getrandbits(64))
+        if not isinstance(self.Q_table, QTable) or self.Q_table.num_actions != len(TRANSFORMS[IDENTITY]):
+            # The states of a sparse table are not in an array: one board at a time (with the random module)
+            return np.array([self._movement_or_none(board, greedy) for board in boards.tolist()], dtype=np.int64)
+
+        Q_values, visited = table_arrays(self.Q_table)
+        legal = boards == Constants.EMPTY
+        if self.symmetric:
+            # Canonical state of each board (the transform with the minimum state, see Symmetry.canonicalize)
+            transformed = boards @ np.array(WEIGHTS, dtype=np.int64).T
+            transforms = transformed.argmin(axis=1)
+            states = transformed[np.arange(len(boards)), transforms]
+            # q values of the positions of the original boards
+            values = Q_values[states[:, None], np.array(INVERSES)[transforms]]
+        else:
+            states = encode_states(boards)
+            values = Q_values[states]
+
+        actions = best_actions(values, legal)
+        explore = (rng.random(len(boards)) < greedy) | (visited[states] == 0)
+        actions[explore] = random_actions(legal[explore], rng)
+        actions[~legal.any(axis=1)] = -1
+        return actions
+
+    def _movement_or_none(self, board, greedy):
+        """Performs a movement (-1 if the board has no free positions, see movement_batch)."""
+        if not Constants.EMPTY in board:
+            return -1
+        return self.movement(board, greedy)
 
     def random_movement(self, board):
         """Performs a random movement.
@@ -70,11 +140,7 @@ class AgentQLearning:
         list of int
             List with free positions
         """
-        positions = []
-        for index, value in enumerate(board):
-            if value == Constants.EMPTY:
-                positions.append(index)
-        return positions
+        return [index for index, value in enumerate(board) if value == Constants.EMPTY]
 
     def get_qvalue(self, board, action):
         """Gets the q value.
@@ -91,10 +157,10 @@ class AgentQLearning:
         int
             The q value
         """
-        state = self._convert_state(board)
-        if not state in self.Q_table:
-            return 0
-        return self.Q_table[state][action]
+        state, transform = self._convert_state_transform(board)
+        if transform != IDENTITY:
+            action = to_canonical_action(action, transform)
+        return self.Q_table.get(state, action)
 
     def get_qvalue_max(self, board):
         """Returns the maximum qvalue for a given state (board)
@@ -106,13 +172,58 @@ class AgentQLearning:
 
         Returns
         -------
-        int
-            The maximum qvalue for a given state (board)
+        float
+            The maximum qvalue of the free positions (0 if the state has not been visited or the board has no free positions)
+        """
+        return self.get_best_action_value(board)[1]
+
+    def get_best_action_value(self, board):
+        """Gets the free position with the maximum q value and its q value (one lookup of the q table).
+
+        Params:
+        ----------
+        board : list of int
+            The current board
+
+        Returns
+        -------
+        (int or None, float)
+            The position on the board and its q value. (None, 0) if the state has not been visited
+            or the board has no free positions (the game has finished)
         """
-        state = self._convert_state(board)
+        state, transform = self._convert_state_transform(board)
         if not state in self.Q_table:
-            return 0
-        return max(self.Q_table[state], key=self.Q_table[state].get)
+            return None, 0.0
+        positions = self._get_free_positions(board)
+        if transform == IDENTITY:
+            return self.Q_table.best_action_value(state, positions)
+        inverse = INVERSES[transform]
+        action, value = self.Q_table.best_action_value(state, [inverse[pos] for pos in positions])
+        return (None if action is None else from_canonical_action(action, transform)), value
+
+    def _best_action(self, state, transform, board):
+        """Gets the free position with the maximum q value.
+
+        Params:
+        ----------
+        state : int
+            The state from the board
+        transform : int
+            The transform from the board to the state
+        board : list of int
+            The current board
+
+        Returns
+        -------
+        int
+            The position on the board (0 to 8)
+        """
+        positions = self._get_free_positions(board)
+        if transform == IDENTITY:
+            return self.Q_table.best_action(state, positions)
+        inverse = INVERSES[transform]
+        action = self.Q_table.best_action(state, [inverse[pos] for pos in positions])
+        return from_canonical_action(action, transform)
 
     def update_qvalue(self, value, board, action):
         """Update the qtable with a new qvalue
@@ -126,19 +237,16 @@ class AgentQLearning:
         action : int
             The action to be taken
         """
-        if not action in self._get_free_positions(board):
+        if not legal_mask(board) >> action & 1:
             print('Invalid Action: ', action, value)
         
-        state = self._convert_state(board)
-        
-        if not state in self.Q_table:
-            positions = self._get_free_positions(board)
-            self.Q_table[state] = { i : 0 for i in positions }
-            
-        self.Q_table[state][action] = value
+        state, transform = self._convert_state_transform(board)
+        if transform != IDENTITY:
+            action = to_canonical_action(action, transform)
+        self.Q_table.set(state, action, value)
 
     def _convert_state(self, board):
-        """Converts board to a valid state (string) for use as a dictionary key (qtable).
+        """Converts board to a valid state (base-3 integer) for use as an index of the qtable.
         
         Params:
         ----------
@@ -147,24 +255,64 @@ class AgentQLearning:
 
         Returns
         -------
-        str
+        int
             The state from the board
         """
-        return ''.join(str(x) for x in board)
+        if self.symmetric:
+            return canonicalize(board)[0]
+        return encode_state(board)
 
-    def write_qtable(self):
-        """Writes the qtable to a file."""
-        with open(Constants.QTABLE_FILE, 'wb') as handle:
-            pickle.dump(self.Q_table, handle, protocol=pickle.HIGHEST_PROTOCOL)
+    def _convert_state_transform(self, board):
+        """Converts board to a valid state and gets the transform used to get it.
 
-    def read_qtable(self):
-        """Reads the qtable from a file."""
+        Params:
+        ----------
+        board : list of int
+            The current board
+
+        Returns
+        -------
+        (int, int)
+            state: the state from the board
+            transform: the index of the symmetry (see Symmetry.TRANSFORMS) that maps the board to the state.
+                It is always the identity if the agent is not symmetric
+        """
+        if self.symmetric:
+            return canonicalize(board)
+        return encode_state(board), IDENTITY
+
+    def write_qtable(self, file=None):
+        """Writes the qtable to a file (binary or legacy format, see QTable.write_table).
+        A symmetric table is written with all the symmetric boards so any agent can read it.
+
+        Params:
+        ----------
+        file : str or None
+            The file where writes the qtable. If it is None, Constants.QTABLE_FILE is used
+        """
+        file = file or Constants.QTABLE_FILE
+        Q_table = expand_table(self.Q_table) if self.symmetric else self.Q_table
+        write_table(Q_table, file)
+
+    def read_qtable(self, file=None):
+        """Reads the qtable from a file (binary or legacy format, see QTable.read_table).
+
+        Params:
+        ----------
+        file : str or None
+            The file where reads the qtable. If it is None, Constants.QTABLE_FILE is used
+        """
+        file = file or Constants.QTABLE_FILE
         try:
-            with open(Constants.QTABLE_FILE, 'rb') as handle:
-                self.Q_table = pickle.load(handle)
+            self.Q_table = read_table(file)
+            if self.symmetric:
+                self.Q_table = reduce_table(self.Q_table)
         except FileNotFoundError:
-            self.Q_table = {}
-            print('Error: File could not be read ', Constants.QTABLE_FILE)
+            self.Q_table = QTable()
+            print('Error: File could not be read ', file)
         except EOFError:
-            self.Q_table = {}
+            self.Q_table = QTable()
             print('EOFError reading file')
+        except QTableFormatError as error:
+            self.Q_table = QTable()
+            print('Error:', error)
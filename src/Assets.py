@@ -0,0 +1,64 @@
+import pygame
+
+import Constants
+
+# Cache of the loaded resources. Key: (path, size). Value: the image or the font
+_images = {}
+_fonts = {}
+
+def get_image(path, size):
+    """Gets an image scaled to a size. It is loaded and scaled only the first time.
+
+    Params:
+    ----------
+    path : str
+        The direction of the image
+    size : (int, int)
+        The size of the image (width, height)
+
+    Returns
+    -------
+    Surface (pygame)
+        The image
+    """
+    key = (path, size)
+    image = _images.get(key)
+    if image is None:
+        image = _images[key] = pygame.transform.scale(pygame.image.load(path), size)
+    return image
+
+def get_font(path, size):
+    """Gets a font. It is loaded only the first time.
+
+    Params:
+    ----------
+    path : str
+        The direction of the font
+    size : int
+        The size of the font
+
+    Returns
+    -------
+    Font (pygame.font)
+        The font
+    """
+    key = (path, size)
+    font = _fonts.get(key)
+    if font is None:
+        font = _fonts[key] = pygame.font.Font(path, size)
+    return font
+
+def get_background():
+    """Gets the background image scaled to the size of the screen. It is loaded the first time.
+
+    Returns
+    -------
+    Surface (pygame)
+        The background image
+    """
+    return get_image(Constants.IMAGE_BACKGROUND, (Constants.SCREEN_WIDTH, Constants.SCREEN_HEIGHT))
+
+def clear():
+    """Removes all the loaded resources (they are loaded again when they are used)."""
+    _images.clear()
+    _fonts.clear()
@@ -0,0 +1,225 @@
+import numpy as np
+
+import Constants
+from QTable import POWERS
+from TicTacToeBitboard import WIN_MASKS
+
+NUM_CELLS = Constants.NUM_ROWS*Constants.NUM_COLUMNS
+
+# Powers of 3 to encode the boards (see QTable.encode_state)
+POWERS_VECTOR = np.array(POWERS, dtype=np.int64)
+# Matrix with the winning lines. LINES[i, l] is 1 if the position i belongs to the line l
+LINES = np.array([[mask >> pos & 1 for mask in WIN_MASKS] for pos in range(NUM_CELLS)], dtype=np.int8)
+LINE_LENGTH = int(LINES[:, 0].sum())
+
+def table_arrays(table):
+    """Gets NumPy views (without copies) of a q table.
+
+    Params:
+    ----------
+    table : QTable
+        The q table
+
+    Returns
+    -------
+    (ndarray, ndarray)
+        values: the q values with shape (num_states, num_actions)
+        visited: the visited flag of each state with shape (num_states,)
+    """
+    values = np.frombuffer(table.values, dtype=np.float32).reshape(table.num_states, table.num_actions)
+    visited = np.frombuffer(table.visited, dtype=np.uint8)
+    return values, visited
+
+def encode_states(boards):
+    """Encodes boards as base-3 integers.
+
+    Params:
+    ----------
+    boards : ndarray
+        The boards with shape (N, 9)
+
+    Returns
+    -------
+    ndarray
+        The states with shape (N,)
+    """
+    return boards @ POWERS_VECTOR
+
+def check_wins(boards, player):
+    """Checks if a player has won on each board.
+
+    Params:
+    ----------
+    boards : ndarray
+        The boards with shape (N, 9)
+    player : int
+        The player (1 or 2)
+
+    Returns
+    -------
+    ndarray of bool
+        True if the player has won on the board, with shape (N,)
+    """
+    return ((boards == player).astype(np.int8) @ LINES == LINE_LENGTH).any(axis=1)
+
+def random_actions(legal, rng):
+    """Chooses a random legal action on each board.
+
+    Params:
+    ----------
+    legal : ndarray of bool
+        The legal actions with shape (N, 9)
+    rng : numpy.random.Generator
+        The random generator
+
+    Returns
+    -------
+    ndarray
+        The actions with shape (N,)
+    """
+    return np.where(legal, rng.random(legal.shape), -1.0).argmax(axis=1)
+
+def best_actions(values, legal):
+    """Chooses the legal action with the maximum q value on each board. Ties are resolved with the first action.
+
+    Params:
+    ----------
+    values : ndarray
+        The q values with shape (N, 9)
+    legal : ndarray of bool
+        The legal actions with shape (N, 9)
+
+    Returns
+    -------
+    ndarray
+        The actions with shape (N,)
+    """
+    return np.where(legal, values, -np.inf).argmax(axis=1)
+
+def best_actions_values(values, legal):
+    """Chooses the legal action with the maximum q value on each board and gets its q value.
+
+    Params:
+    ----------
+    values : ndarray
+        The q values with shape (N, 9)
+    legal : ndarray of bool
+        The legal actions with shape (N, 9)
+
+    Returns
+    -------
+    (ndarray, ndarray)
+        The actions and their q values with shape (N,). The q value is -inf if the board has no legal actions
+    """
+    masked = np.where(legal, values, -np.inf)
+    actions = masked.argmax(axis=1)
+    return actions, masked[np.arange(len(actions)), actions]
+
+def qvalues_max(values, visited, states, legal):
+    """Gets the maximum q value of the next states used by the update of the qlearning (see AgentQLearning.get_qvalue_max).
+
+    Params:
+    ----------
+    values : ndarray
+        The q values of the table with shape (num_states, 9)
+    visited : ndarray
+        The visited flag of each state of the table
+    states : ndarray
+        The next states with shape (N,)
+    legal : ndarray of bool
+        The legal actions of the next states with shape (N, 9)
+
+    Returns
+    -------
+    ndarray
+        The values with shape (N,) (0 if the state has not been visited or it has no legal actions)
+    """
+    _, q_max = best_actions_values(values[states], legal)
+    return np.where((visited[states] == 1) & legal.any(axis=1), q_max, 0)
+
+def train_batch(player, iterations, batch_size=1024, alpha=Constants.ALPHA, discount_factor=Constants.DISCOUNT_FACTOR,
+        greedy=Constants.GREEDY, seed=None):
+    """Trains the qlearning algorithm playing many games at the same time (in lockstep) with NumPy.
+    It uses the same algorithm as Controller.train_q_learning. When several games update the same
+    state and action in the same movement only one of the updates is kept.
+
+    Params:
+    ----------
+    player : AgentQLearning
+        The agent to train. Its q table is updated in place
+    iterations : int
+        Number of games of training
+    batch_size : int
+        Number of games played at the same time
+    alpha : float
+        The learning rate
+    discount_factor : float
+        The discount factor
+    greedy : float
+        The probability of performing a random movement
+    seed : int or None
+        The seed of the random generator
+    """
+    if player.symmetric:
+        raise ValueError('The batch training does not support symmetric q tables')
+
+    rng = np.random.default_rng(seed)
+    Q_values, visited = table_arrays(player.Q_table)
+
+    for start in range(0, iterations, batch_size):
+        n = min(batch_size, iterations - start)
+        rows = np.arange(n)
+        boards = np.zeros((n, NUM_CELLS), dtype=np.int64)
+        active = np.ones(n, dtype=bool)
+
+        # First movement (random)
+        states = encode_states(boards)
+        actions = random_actions(boards == Constants.EMPTY, rng)
+        boards[rows, actions] = Constants.PLAYER1
+        n_states = encode_states(boards)
+
+        for move in range(1, NUM_CELLS):
+            idx = np.flatnonzero(active)
+            if idx.size == 0:
+                break
+            player_symbol = Constants.PLAYER1 if move % 2 == 0 else Constants.PLAYER2
+            sub_boards = boards[idx]
+            sub_n_states = n_states[idx]
+            legal = sub_boards == Constants.EMPTY
+
+            # Action selection (epsilon greedy)
+            actions2 = best_actions(Q_values[sub_n_states], legal)
+            explore = (rng.random(idx.size) < greedy) | (visited[sub_n_states] == 0)
+            actions2[explore] = random_actions(legal[explore], rng)
+
+            # Step
+            sub_boards[np.arange(idx.size), actions2] = player_symbol
+            boards[idx] = sub_boards
+            n_states2 = encode_states(sub_boards)
+            win = check_wins(sub_boards, player_symbol)
+            done = win | (move == NUM_CELLS - 1)
+            rewards2 = np.where(win, Constants.REWARD_WIN, np.where(done, Constants.REWARD_TIE, 0))
+
+            # Finished games
+            d = np.flatnonzero(done)
+            if d.size:
+                s, a = sub_n_states[d], actions2[d]
+                Q_values[s, a] = (1-alpha)*Q_values[s, a] + alpha*rewards2[d]
+                visited[s] = 1
+                s, a = states[idx[d]], actions[idx[d]]
+                Q_values[s, a] = (1-alpha)*Q_values[s, a] + alpha*np.where(win[d], -rewards2[d], rewards2[d])
+                visited[s] = 1
+
+            # Running games
+            c = np.flatnonzero(~done)
+            if c.size:
+                s2 = n_states2[c]
+                q_max = qvalues_max(Q_values, visited, s2, sub_boards[c] == Constants.EMPTY)
+                s, a = states[idx[c]], actions[idx[c]]
+                Q_values[s, a] = (1-alpha)*Q_values[s, a] + alpha*(rewards2[c] + discount_factor*q_max)
+                visited[s] = 1
+
+            states[idx] = sub_n_states
+            n_states[idx] = n_states2
+            actions[idx] = actions2
+            active[idx[done]] = False
@@ -0,0 +1,150 @@
+import os
+import pickle
+import queue
+import random
+import threading
+from array import array
+
+from QTable import QTable
+
+CHECKPOINT_VERSION = 1
+
+class Checkpointer:
+    """
+    Saves checkpoints of a training (see Training.train) every interval episodes. The checkpoint has the
+    q table, the number of episodes played, the hyperparameters and the state of the random generator,
+    so the training can continue exactly from it (see load_checkpoint). The state of a TrainingMonitor and
+    an EarlyStopping is not stored: they start again at the resumed episode.
+
+    The checkpoints are written by a background thread (the training only copies the q table). Each one is
+    written to a temporary file that replaces the checkpoint file, so the file always has a complete checkpoint.
+
+    Attributes:
+    ----------
+    file : str
+        The checkpoint file
+    interval : int
+        Number of episodes between checkpoints
+    hyperparameters : dict
+        Parameters of the training stored in the checkpoints (iterations, alpha, discount_factor, greedy...)
+    """
+
+    def __init__(self, file, interval=10000, hyperparameters=None):
+        """Initializes the checkpointer and starts the writer thread.
+
+        Params:
+        ----------
+        file : str
+            The checkpoint file
+        interval : int
+            Number of episodes between checkpoints
+        hyperparameters : dict or None
+            Parameters of the training stored in the checkpoints
+        """
+        self.file = file
+        self.interval = interval
+        self.hyperparameters = hyperparameters or {}
+        self._queue = queue.Queue(maxsize=1)
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+
+    def episode_finished(self, episode, player):
+        """Saves a checkpoint if the episode is the last one of an interval.
+
+        Params:
+        ----------
+        episode : int
+            Number of episodes played
+        player : AgentQLearning
+            The agent that is training
+        """
+        if episode % self.interval == 0:
+            self.save(episode, player)
+
+    def save(self, episode, player):
+        """Saves a checkpoint. If the thread is still writing the previous checkpoint, it is replaced by this one.
+
+        Params:
+        ----------
+        episode : int
+            Number of episodes played
+        player : AgentQLearning
+            The agent that is training
+        """
+        table = player.Q_table
+        checkpoint = {
+            'version': CHECKPOINT_VERSION,
+            'episode': episode,
+            'hyperparameters': self.hyperparameters,
+            'symmetric': player.symmetric,
+            'random_state': random.getstate(),
+            'num_actions': table.num_actions,
+            'values': table.values.tobytes(),
+            'visited': bytes(table.visited),
+        }
+        while True:
+            try:
+                self._queue.put_nowait(checkpoint)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()    # Discards the pending checkpoint (it is older)
+                    self._queue.task_done()
+                except queue.Empty:
+                    pass
+
+    def close(self):
+        """Waits until the pending checkpoint is written and stops the writer thread."""
+        self._queue.join()
+        self._queue.put(None)
+        self._thread.join()
+
+    def _write_loop(self):
+        """Writes the checkpoints of the queue (it runs on the writer thread)."""
+        while True:
+            checkpoint = self._queue.get()
+            try:
+                if checkpoint is None:
+                    return
+                temp_file = self.file + '.tmp'
+                with open(temp_file, 'wb') as handle:
+                    pickle.dump(checkpoint, handle, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_file, self.file)
+            finally:
+                self._queue.task_done()
+
+def load_checkpoint(file):
+    """Reads a checkpoint.
+
+    Params:
+    ----------
+    file : str
+        The checkpoint file
+
+    Returns
+    -------
+    dict
+        The checkpoint (see Checkpointer.save)
+    """
+    with open(file, 'rb') as handle:
+        checkpoint = pickle.load(handle)
+    if checkpoint.get('version') != CHECKPOINT_VERSION:
+        raise ValueError('Invalid checkpoint file: ' + file)
+    return checkpoint
+
+def restore(checkpoint):
+    """Restores the q table and the state of the random generator of a checkpoint.
+
+    Params:
+    ----------
+    checkpoint : dict
+        The checkpoint (see load_checkpoint)
+
+    Returns
+    -------
+    QTable
+        The q table of the checkpoint
+    """
+    table = QTable(checkpoint['num_actions'], array(QTable.TYPECODE, checkpoint['values']), bytearray(checkpoint['visited']))
+    random.setstate(checkpoint['random_state'])
+    return table
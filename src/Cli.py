@@ -0,0 +1,396 @@
+"""Headless entry point (it does not import pygame). Run it from the root folder of the project:
+
+    python src/Cli.py train --episodes 100000 --out assets/qtable.qtb
+    python src/Cli.py train --episodes 1000000 --checkpoint training.ckpt
+    python src/Cli.py train --resume training.ckpt
+    python src/Cli.py train --board-size 4 --win-length 4 --max-states 1000000 --out assets/qtable4x4.pickle
+    python src/Cli.py train --agent linear --board-size 5 --win-length 4 --out assets/linear5x5.npy
+    python src/Cli.py convert assets/qtable.pickle assets/qtable.qtb
+    python src/Cli.py serve --port 8765
+"""
+import argparse
+import functools
+import random
+
+import Constants
+import Solver
+import Tournament
+import Training
+from AgentQLearning import AgentQLearning
+from Checkpoint import Checkpointer, load_checkpoint, restore
+from ParallelTrainer import train_parallel
+from QTable import NUM_CELLS, QTable, SparseQTable, read_table, write_table
+from ReplayBuffer import ReplayBuffer
+from TicTacToe import TicTacToe
+from TicTacToeBitboard import TicTacToeBitboard
+from TicTacToeCompact import TicTacToeCompact
+from TicTacToeNxN import TicTacToeNxN
+from TrainingMonitor import EarlyStopping, TrainingMonitor
+
+ENGINES = {
+    'list': TicTacToe,
+    'bitboard': TicTacToeBitboard,
+    'compact': TicTacToeCompact,
+}
+
+# Arguments of the train command stored in the checkpoints (they are restored with --resume) and their defaults.
+# Their parser defaults are None, so the arguments given in the command line can be told apart from the stored ones
+CHECKPOINT_HYPERPARAMETERS = {
+    'episodes': 100000,
+    'alpha': Constants.ALPHA,
+    'gamma': Constants.DISCOUNT_FACTOR,
+    'epsilon': Constants.GREEDY,
+    'engine': 'compact',
+    'symmetric': False,
+    'seed': 0,
+}
+
+def resolve_hyperparameters(args, stored=None):
+    """Sets the hyperparameters that are not given in the command line: the stored ones of a checkpoint
+    or the defaults (see CHECKPOINT_HYPERPARAMETERS). The given ones win over the stored ones.
+
+    Params:
+    ----------
+    args : argparse.Namespace
+        The arguments of the train command (updated in place)
+    stored : dict or None
+        The hyperparameters of the checkpoint that is resumed
+
+    Returns
+    -------
+    list of str
+        The names of the stored hyperparameters that are replaced by a different value of the command line
+    """
+    stored = stored or {}
+    overridden = []
+    for name, default in CHECKPOINT_HYPERPARAMETERS.items():
+        value = getattr(args, name)
+        if value is None:
+            setattr(args, name, stored.get(name, default))
+        elif name in stored and value != stored[name]:
+            overridden.append(name)
+    return overridden
+
+def train(args):
+    """Trains an agent and writes its q table.
+
+    Params:
+    ----------
+    args : argparse.Namespace
+        The arguments of the train command
+    """
+    checkpoint = load_checkpoint(args.resume) if args.resume else None
+    overridden = resolve_hyperparameters(args, checkpoint['hyperparameters'] if checkpoint else None)
+    if (args.checkpoint or args.resume) and (args.workers or args.batch_size or args.replay_size):
+        raise SystemExit('The checkpoints are only available for the sequential training without replay')
+    if args.replay_size and (args.workers or args.batch_size):
+        raise SystemExit('The replay is only available for the sequential training')
+    if args.batch_size and args.symmetric:
+        raise SystemExit('The batch training does not support symmetric q tables')
+    if args.stop_win_rate is not None and not args.eval_games:
+        raise SystemExit('--stop-win-rate needs --eval-games (the win rate is measured with evaluation games)')
+    if args.agent == 'linear':
+        train_linear(args)
+        return
+    if args.board_size**2 > NUM_CELLS or args.max_states is not None:
+        train_sparse(args)
+        return
+    first_episode = 0
+    if checkpoint:
+        # The training continues with the random state of the checkpoint and its hyperparameters (except the given ones)
+        if 'symmetric' in overridden:
+            raise SystemExit('The q table of the checkpoint is {}symmetric'.format('' if checkpoint['symmetric'] else 'not '))
+        for name in overridden:
+            if name != 'episodes':
+                print('The resumed training uses {} {} instead of {} (it is not the same as an uninterrupted training)'.format(
+                    name, getattr(args, name), checkpoint['hyperparameters'][name]))
+        if args.early_stopping:
+            print('The early stopping starts again at the resumed episode (its state is not in the checkpoint)')
+        player = AgentQLearning(symmetric=checkpoint['symmetric'], Q_table=restore(checkpoint))
+        first_episode = checkpoint['episode']
+        args.checkpoint = args.checkpoint or args.resume
+        print('Resuming the training from episode', first_episode)
+    elif args.init:
+        player = AgentQLearning(symmetric=args.symmetric)
+        player.read_qtable(args.init)
+        random.seed(args.seed)
+    else:
+        player = AgentQLearning(symmetric=args.symmetric, Q_table=QTable())
+        random.seed(args.seed)
+    game_class = ENGINES[args.engine]
+
+    if args.workers:
+        train_parallel(player, args.episodes, args.workers, args.sync_interval, args.seed, game_class,
+            args.alpha, args.gamma, args.epsilon)
+    elif args.batch_size:
+        from BatchTrainer import train_batch   # NumPy is only needed for the batch training
+        train_batch(player, args.episodes, args.batch_size, args.alpha, args.gamma, args.epsilon, args.seed)
+    else:
+        monitor, stopping = build_monitor(args)
+        checkpointer = None
+        if args.checkpoint:
+            hyperparameters = {name: getattr(args, name) for name in CHECKPOINT_HYPERPARAMETERS}
+            checkpointer = Checkpointer(args.checkpoint, args.checkpoint_every, hyperparameters)
+        try:
+            episodes = Training.train(player, args.episodes, game_class, args.alpha, args.gamma, args.epsilon, monitor, stopping,
+                checkpointer, first_episode, build_replay(args))
+            if checkpointer:
+                checkpointer.save(episodes, player)
+        finally:
+            if checkpointer:
+                checkpointer.close()
+        if episodes < args.episodes:
+            print('The q table has converged after', episodes, 'episodes')
+
+    player.write_qtable(args.out)
+    print('The training has finished:', len(player.Q_table), 'states written to', args.out)
+
+def build_monitor(args):
+    """Creates the monitor and the early stopping of the train command.
+
+    Returns
+    -------
+    (TrainingMonitor or None, EarlyStopping or None)
+        The monitor and the early stopping (None if they are not used)
+    """
+    monitor = stopping = None
+    if args.log or args.eval_games or args.early_stopping:
+        monitor = TrainingMonitor(args.log_interval, args.log, print if args.eval_games and not args.log else None, args.eval_games,
+            evaluation_seed=args.seed)
+    if args.early_stopping:
+        stopping = EarlyStopping(args.stop_policy_change, args.stop_max_delta, args.stop_mean_delta, args.stop_window, args.stop_win_rate)
+    return monitor, stopping
+
+def build_replay(args):
+    """Creates the replay buffer of the train command.
+
+    Returns
+    -------
+    ReplayBuffer or None
+        The replay buffer (None if it is not used)
+    """
+    if not args.replay_size:
+        return None
+    return ReplayBuffer(args.replay_size, args.replay_batch, args.replay_interval, args.board_size**2, args.seed)
+
+def train_sparse(args):
+    """Trains an agent with a SparseQTable (boards bigger than 3x3 or a limited number of states) and writes its q table.
+
+    Params:
+    ----------
+    args : argparse.Namespace
+        The arguments of the train command
+    """
+    if args.workers or args.batch_size or args.symmetric or args.checkpoint or args.resume:
+        raise SystemExit('A sparse q table is only available for the sequential training without symmetries or checkpoints')
+    if args.out.endswith(Constants.QTABLE_BINARY_EXTENSION):
+        raise SystemExit('A sparse q table can only be written with the legacy format: ' + args.out)
+    num_cells = args.board_size**2
+    if args.init:
+        table = SparseQTable.from_dict(read_table(args.init).to_dict(), args.max_states)
+        if table.num_actions != num_cells:
+            raise SystemExit('The q table of {} is not for a {}x{} board'.format(args.init, args.board_size, args.board_size))
+    else:
+        table = SparseQTable(num_cells, args.max_states)
+    player = AgentQLearning(Q_table=table)
+    game_class = functools.partial(TicTacToeNxN, args.board_size, args.board_size, args.win_length)
+    random.seed(args.seed)
+
+    monitor, stopping = build_monitor(args)
+    episodes = Training.train(player, args.episodes, game_class, args.alpha, args.gamma, args.epsilon, monitor, stopping,
+        replay=build_replay(args))
+    if episodes < args.episodes:
+        print('The q table has converged after', episodes, 'episodes')
+
+    player.write_qtable(args.out)
+    print('The training has finished:', len(table), 'states written to', args.out)
+    print('Memory of the q table: {:.1f} MB, {} states evicted'.format(table.memory_usage()/2**20, table.evictions))
+
+def train_linear(args):
+    """Trains an AgentLinear and writes its weights.
+
+    Params:
+    ----------
+    args : argparse.Namespace
+        The arguments of the train command
+    """
+    if args.workers or args.batch_size or args.symmetric or args.checkpoint or args.resume or args.max_states is not None:
+        raise SystemExit('The linear agent is only available for the sequential training without symmetries, checkpoints or q table options')
+    if args.early_stopping and args.stop_max_delta is None and args.stop_mean_delta is None and args.stop_win_rate is None:
+        raise SystemExit('The linear agent has no q table: use --stop-max-delta, --stop-mean-delta or --stop-win-rate with --early-stopping')
+    if args.board_size**2 > 40:
+        raise SystemExit('The linear agent is only available for boards with at most 40 positions (its replay buffer stores 64 bit states)')
+    from AgentLinear import AgentLinear   # NumPy is only needed for the linear agent
+    player = AgentLinear(args.board_size, args.board_size, args.win_length, args.learning_rate, seed=args.seed)
+    if args.init:
+        player.read_weights(args.init)
+    game_class = functools.partial(TicTacToeNxN, args.board_size, args.board_size, args.win_length)
+    random.seed(args.seed)
+
+    monitor, stopping = build_monitor(args)
+    if stopping is not None:
+        stopping.max_policy_change = None
+    episodes = Training.train(player, args.episodes, game_class, args.alpha, args.gamma, args.epsilon, monitor, stopping,
+        replay=build_replay(args))
+    if episodes < args.episodes:
+        print('The weights have converged after', episodes, 'episodes')
+
+    out = Constants.LINEAR_WEIGHTS_FILE if args.out == Constants.QTABLE_FILE else args.out
+    player.write_weights(out)
+    print('The training has finished: weights written to', out)
+
+def convert(args):
+    """Converts a q table file to another format (see QTable.write_table).
+
+    Params:
+    ----------
+    args : argparse.Namespace
+        The arguments of the convert command
+    """
+    table = read_table(args.input)
+    write_table(table, args.output)
+    print(len(table), 'states written to', args.output)
+
+def solve(args):
+    """Solves the game, writes the perfect-play table and evaluates q tables against it.
+
+    Params:
+    ----------
+    args : argparse.Namespace
+        The arguments of the solve command
+    """
+    scores = Solver.solve()
+    print(len(scores), 'states solved')
+    if args.out:
+        write_table(Solver.to_qtable(), args.out)
+        print('Perfect-play table written to', args.out)
+    for file in args.evaluate:
+        player = AgentQLearning(Q_table=read_table(file, writable=False))
+        print(file, 'optimal movements: {:.2%}'.format(Solver.evaluate_agent(player)))
+
+def tournament(args):
+    """Plays a tournament between policies and writes its report as JSON.
+
+    Params:
+    ----------
+    args : argparse.Namespace
+        The arguments of the tournament command
+    """
+    if args.games < 1:
+        raise SystemExit('The number of games must be at least 1')
+    report = Tournament.run_tournament(args.policies, args.games, args.workers, args.seed)
+    Tournament.write_report(report, args.out)
+
+def serve(args):
+    """Serves games against the AI until it is interrupted (see GameServer).
+
+    Params:
+    ----------
+    args : argparse.Namespace
+        The arguments of the serve command
+    """
+    import asyncio
+    import GameServer
+    from TableRegistry import get_agent
+
+    agent = get_agent(args.qtable, args.symmetric)
+    try:
+        asyncio.run(GameServer.serve(agent, args.host, args.port, args.window_ms/1000, args.max_batch, args.epsilon, args.max_sessions))
+    except KeyboardInterrupt:
+        pass
+
+def build_parser():
+    """Builds the parser of the command line arguments.
+
+    Returns
+    -------
+    argparse.ArgumentParser
+        The parser
+    """
+    parser = argparse.ArgumentParser(description='Tic Tac Toe qlearning (headless)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    train_parser = commands.add_parser('train', help='Trains the qlearning agent')
+    # The defaults of the hyperparameters are set by resolve_hyperparameters (see CHECKPOINT_HYPERPARAMETERS)
+    train_parser.add_argument('--episodes', type=int, default=None, help='Number of games of training (default 100000)')
+    train_parser.add_argument('--alpha', type=float, default=None, help='Learning rate (default {})'.format(Constants.ALPHA))
+    train_parser.add_argument('--gamma', type=float, default=None, help='Discount factor (default {})'.format(Constants.DISCOUNT_FACTOR))
+    train_parser.add_argument('--epsilon', type=float, default=None, help='Probability of a random movement (default {})'.format(Constants.GREEDY))
+    train_parser.add_argument('--out', default=Constants.QTABLE_FILE, help='File where writes the q table')
+    train_parser.add_argument('--init', default=None, help='File with the q table to continue training (empty table if it is not set)')
+    train_parser.add_argument('--symmetric', action='store_true', default=None, help='Share the q values of symmetric boards')
+    train_parser.add_argument('--engine', choices=sorted(ENGINES), default=None, help='Game engine (default compact)')
+    train_parser.add_argument('--batch-size', type=int, default=None, help='Play games in lockstep batches (NumPy)')
+    train_parser.add_argument('--workers', type=int, default=None, help='Number of worker processes')
+    train_parser.add_argument('--sync-interval', type=int, default=5000, help='Games per worker between merges')
+    train_parser.add_argument('--seed', type=int, default=None, help='Seed of the random generators (default 0)')
+    train_parser.add_argument('--log', default=None, help='File where appends the training metrics (JSON lines, see TrainingMonitor)')
+    train_parser.add_argument('--log-interval', type=int, default=1000, help='Episodes between training metrics')
+    train_parser.add_argument('--eval-games', type=int, default=0, help='Games against a random player in each metrics record')
+    train_parser.add_argument('--early-stopping', action='store_true', help='Stop when the q table converges (see EarlyStopping)')
+    train_parser.add_argument('--stop-policy-change', type=float, default=0.05, help='Maximum fraction of greedy actions changed in a converged interval')
+    train_parser.add_argument('--stop-max-delta', type=float, default=None, help='Maximum change of a q value in a converged interval')
+    train_parser.add_argument('--stop-mean-delta', type=float, default=None, help='Maximum mean change of the q values in a converged interval')
+    train_parser.add_argument('--stop-window', type=int, default=3, help='Consecutive converged intervals to stop')
+    train_parser.add_argument('--stop-win-rate', type=float, default=None, help='Minimum win rate against a random player to stop (needs --eval-games)')
+    train_parser.add_argument('--agent', choices=('table', 'linear'), default='table',
+        help='Agent to train: q table (AgentQLearning) or linear approximation (AgentLinear, NumPy)')
+    train_parser.add_argument('--learning-rate', type=float, default=0.2, help='Learning rate of the weights of the linear agent')
+    train_parser.add_argument('--board-size', type=int, default=Constants.NUM_ROWS, help='Rows and columns of the board (see TicTacToeNxN)')
+    train_parser.add_argument('--win-length', type=int, default=Constants.WIN_LENGTH, help='Parts in a row needed to win')
+    train_parser.add_argument('--max-states', type=int, default=None,
+        help='Maximum states of the q table (the least recently used are evicted). A sparse q table is used if it is set or the board is bigger than 3x3')
+    train_parser.add_argument('--replay-size', type=int, default=0, help='Transitions of the replay buffer (0 to not replay, see ReplayBuffer)')
+    train_parser.add_argument('--replay-batch', type=int, default=64, help='Transitions replayed in each minibatch')
+    train_parser.add_argument('--replay-interval', type=int, default=1, help='Episodes between minibatches of the replay')
+    train_parser.add_argument('--checkpoint', default=None, help='File where saves checkpoints of the training (see Checkpoint)')
+    train_parser.add_argument('--checkpoint-every', type=int, default=10000, help='Episodes between checkpoints')
+    train_parser.add_argument('--resume', default=None, help='Checkpoint file to continue the training from (it restores the hyperparameters that are not given)')
+    train_parser.set_defaults(func=train)
+
+    convert_parser = commands.add_parser('convert', help='Converts a q table file (binary or legacy pickle format)')
+    convert_parser.add_argument('input', help='File with the q table')
+    convert_parser.add_argument('output', help='File where writes the q table (binary format if its extension is ' +
+        Constants.QTABLE_BINARY_EXTENSION + ')')
+    convert_parser.set_defaults(func=convert)
+
+    solve_parser = commands.add_parser('solve', help='Solves the game (perfect play) with negamax')
+    solve_parser.add_argument('--out', default=None, help='File where writes the perfect-play q table')
+    solve_parser.add_argument('--evaluate', nargs='*', default=[], help='Files with q tables to compare with the solution')
+    solve_parser.set_defaults(func=solve)
+
+    tournament_parser = commands.add_parser('tournament', help='Plays every pair of policies against each other')
+    tournament_parser.add_argument('policies', nargs='+',
+        help='Policies: random, solver, qtable:FILE, qtable-symmetric:FILE or linear:FILE (see Tournament.POLICIES)')
+    tournament_parser.add_argument('--games', type=int, default=10000, help='Number of games of each match')
+    tournament_parser.add_argument('--workers', type=int, default=1, help='Number of worker processes')
+    tournament_parser.add_argument('--seed', type=int, default=0, help='Seed of the random generators')
+    tournament_parser.add_argument('--out', default=None, help='File where writes the JSON report (standard output if it is not set)')
+    tournament_parser.set_defaults(func=tournament)
+
+    serve_parser = commands.add_parser('serve', help='Serves games against the AI over TCP (JSON lines, see GameServer)')
+    serve_parser.add_argument('--host', default='127.0.0.1', help='Address where listens')
+    serve_parser.add_argument('--port', type=int, default=8765, help='Port where listens')
+    serve_parser.add_argument('--qtable', default=None, help='File with the q table of the AI (Constants.QTABLE_FILE if it is not set)')
+    serve_parser.add_argument('--symmetric', action='store_true', help='Share the q values of symmetric boards')
+    serve_parser.add_argument('--window-ms', type=float, default=2.0, help='Milliseconds that a movement of the AI waits for other movements to batch them')
+    serve_parser.add_argument('--max-batch', type=int, default=1024, help='Maximum movements of the AI in a batch')
+    serve_parser.add_argument('--epsilon', type=float, default=0.0, help='Probability of a random movement of the AI')
+    serve_parser.add_argument('--max-sessions', type=int, default=None, help='Maximum number of open games')
+    serve_parser.set_defaults(func=serve)
+
+    return parser
+
+def main(argv=None):
+    """Runs the command line interface.
+
+    Params:
+    ----------
+    argv : list of str or None
+        The arguments. If it is None, sys.argv is used
+    """
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
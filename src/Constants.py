@@ -1,8 +1,7 @@
-import pygame
-
 # GAME
 NUM_ROWS = 3
 NUM_COLUMNS = 3
+WIN_LENGTH = 3  # Parts in a row needed to win
 EMPTY = 0
 PLAYER1 = 1 # X
 PLAYER2 = 2 # O
@@ -11,6 +10,11 @@ REWARD_WIN = 10
 REWARD_LOST = -REWARD_WIN
 REWARD_TIE = 2
 
+# QLEARNING
+ALPHA = 0.5 # Learning rate
+DISCOUNT_FACTOR = 0.9
+GREEDY = 0.25   # Probability of performing a random movement while training
+
 # SIZES
 PART_SIZE = 100
 PART_MARGIN = 15
@@ -24,6 +28,8 @@ SCREEN_HEIGHT = PLUS + 2*MARGIN + NUM_ROWS*(PART_SIZE + 2*PART_MARGIN + STICK_WI
 
 SIZE_FONT_BIG = 40
 
+FPS = 30    # Frames per second of the menus
+
 # COLORS
 COLOR_TEXT = "#b68f40"
 COLOR_BUTTON = "#d7fcd4"
@@ -54,7 +60,6 @@ IMAGE_QUIT_BUTTON = ASSETS + 'Quit Rect.png'
 
 FONT_GAMES = ASSETS + 'games.ttf'
 
-BACKGROUND = pygame.image.load(IMAGE_BACKGROUND)
-BACKGROUND = pygame.transform.scale(BACKGROUND, (SCREEN_WIDTH, SCREEN_HEIGHT))
-
-QTABLE_FILE = ASSETS + 'qtable.pickle'
\ No newline at end of file
+QTABLE_BINARY_EXTENSION = '.qtb'
+QTABLE_FILE = ASSETS + 'qtable' + QTABLE_BINARY_EXTENSION
+LINEAR_WEIGHTS_FILE = ASSETS + 'linear.npy'   # Weights of AgentLinear
\ No newline at end of file
@@ -5,11 +5,16 @@ import sys
 import pygame
 
 import Constants
+import Assets
 
 from TicTacToe import TicTacToe
+from TicTacToeCompact import TicTacToeCompact
 from Player import Player
 from Button import Button
 from AgentQLearning import AgentQLearning
+from ParallelTrainer import train_parallel
+import Training
+import TableRegistry
 
 def main():
     """Initialize the screen and the pygame module."""
@@ -27,7 +32,7 @@ def main():
     main_screen(screen)
 
 def load_image(dir, width, height):
-    """Load the image.
+    """Load the image (it is cached, see Assets).
 
     Params:
         ----------
@@ -43,12 +48,10 @@ def load_image(dir, width, height):
         img
             The image loaded
     """
-    img = pygame.image.load(dir)
-    img = pygame.transform.scale(img, (width, height)) # The image is resized
-    return img
+    return Assets.get_image(dir, (width, height)) # The image is resized (only the first time)
 
 def get_font(size, font):
-    """Loads and gets the font.
+    """Loads and gets the font (it is cached, see Assets).
 
     Params:
     ----------
@@ -57,7 +60,7 @@ def get_font(size, font):
     font : string
         The direction of the font to be load'
     """
-    return pygame.font.Font(font, size)
+    return Assets.get_font(font, size)
 
 def exit():
     """End the application and the pygame module."""
@@ -89,6 +92,7 @@ def main_screen(screen):
     mode_button = Button(image=load_image(Constants.IMAGE_PLAY_BUTTON, 400, 50), pos=(center_x, 240), 
                         text_input=mode, font=get_font(18, font=Constants.FONT_GAMES), base_color=Constants.COLOR_BUTTON, hovering_color=Constants.WHITE)   
 
+    clock = pygame.time.Clock()
     while True:
         
         mouse_position = pygame.mouse.get_pos()
@@ -105,9 +109,9 @@ def main_screen(screen):
                         p2 = Player()
                     elif mode == 'PLAYER (X) VS IA':
                         p1 = Player()
-                        p2 = AgentQLearning()
+                        p2 = TableRegistry.get_agent()
                     elif mode == 'PLAYER (O) VS IA':
-                        p1 = AgentQLearning()
+                        p1 = TableRegistry.get_agent()
                         p2 = Player()
 
                     retry = True
@@ -136,7 +140,7 @@ def main_screen(screen):
                     exit()
 
         # Draws the background image
-        screen.blit(Constants.BACKGROUND, (0, 0))
+        screen.blit(Assets.get_background(), (0, 0))
         screen.blit(title_text, title_text_rect)
 
         # Draws the buttons
@@ -144,6 +148,7 @@ def main_screen(screen):
             button.changeColor(mouse_position)
             button.update(screen)
         pygame.display.update()
+        clock.tick(Constants.FPS)   # Limits the frames per second
 
 def winner_screen(screen, winner):
     """Creates the winner screen.
@@ -185,6 +190,7 @@ def winner_screen(screen, winner):
     quit_button = Button(image=load_image(Constants.IMAGE_QUIT_BUTTON, 300, 90), pos=(center_x, 480), 
                         text_input=Constants.QUIT, font=get_font(Constants.SIZE_FONT_BIG, font=Constants.FONT_GAMES), base_color=Constants.COLOR_BUTTON, hovering_color=Constants.WHITE)
     
+    clock = pygame.time.Clock()
     while True:
         
         mouse_position = pygame.mouse.get_pos()
@@ -205,7 +211,7 @@ def winner_screen(screen, winner):
                     exit()
 
         # Draws the background image
-        screen.blit(Constants.BACKGROUND, (0, 0))
+        screen.blit(Assets.get_background(), (0, 0))
         screen.blit(title_text, title_text_rect)
         screen.blit(winner_text, winner_text_rect)
 
@@ -213,6 +219,7 @@ def winner_screen(screen, winner):
             button.changeColor(mouse_position)
             button.update(screen)
         pygame.display.update()
+        clock.tick(Constants.FPS)   # Limits the frames per second
 
 def training_screen(screen, title_text, title_text_rect):
     """Creates the training screen. It shows a message of training
@@ -234,13 +241,13 @@ def training_screen(screen, title_text, title_text_rect):
     training_text_rect = training_text.get_rect(center=(center_x, center_y))
 
     # Draws the background image
-    screen.blit(Constants.BACKGROUND, (0, 0))
+    screen.blit(Assets.get_background(), (0, 0))
     screen.blit(title_text, title_text_rect)
     screen.blit(training_text, training_text_rect)
 
     pygame.display.update()
 
-def play_game(screen, p1, p2):
+def play_game(screen, p1, p2, game_class=TicTacToe):
     """Run a complete tic tac toe game.
 
     Params:
@@ -251,6 +258,8 @@ def play_game(screen, p1, p2):
         Player 1
     p2 :
         Player 2
+    game_class : class
+        The game engine to use (TicTacToe, TicTacToeBitboard or TicTacToeCompact)
     Returns
     -------
     int or None
@@ -260,7 +269,7 @@ def play_game(screen, p1, p2):
     """
 
     # Initialize the game
-    game = TicTacToe()
+    game = game_class()
     board, turn = game.get_board(), game.get_turn()
 
     game.render(screen)
@@ -281,7 +290,8 @@ def play_game(screen, p1, p2):
 
     return winner
 
-def train_q_learning(screen, iterations=100000):
+def train_q_learning(screen, iterations=100000, game_class=TicTacToeCompact, symmetric=False, batch_size=None,
+        workers=None, sync_interval=5000, seed=0):
     """Trains the qlearning algorithm to play tic tac toe.
 
     Params:
@@ -290,54 +300,41 @@ def train_q_learning(screen, iterations=100000):
         The screen where draws the main menu
     iterations : int
         Number of iterations of training
+    game_class : class
+        The game engine to use (TicTacToe, TicTacToeBitboard or TicTacToeCompact). The batch training
+        ignores it (its games are played with NumPy)
+    symmetric : boolean
+        Indicates if the symmetric boards share their q values (see AgentQLearning)
+    batch_size : int or None
+        If it is set, the games are played in batches of batch_size games at the same time (see BatchTrainer).
+        It can not be used with symmetric
+    workers : int or None
+        If it is set, the games are played on workers processes (see ParallelTrainer)
+    sync_interval : int
+        Number of games that each worker plays between merges of the q tables
+    seed : int
+        The seed of the workers or of the batch training
+
+    Raises
+    ------
+    ValueError
+        If batch_size and symmetric are both set
     """
-    
-    player = AgentQLearning()
-    greedy = 0.25
-
-    for i in range(iterations):
-        alpha = 0.5
-        discount_factor = 0.9
-
-        game = TicTacToe()
-        state, turn = game.get_board().copy(), game.get_turn()
-
-        action = player.random_movement(state)
-        n_state, _, reward, _ = game.step(action)
-        done = False
-        while not done:
-
-            action2 = player.movement(n_state, greedy)
-            n_state2, done, reward2, info = game.step(action2)
-            winner = info['winner']
+    if batch_size and symmetric:
+        raise ValueError('The batch training does not support symmetric q tables')
 
-            if done:
-                q_value = (1-alpha)*player.get_qvalue(n_state, action2) + alpha*(reward2)
-                player.update_qvalue(q_value, n_state, action2)
+    player = AgentQLearning(symmetric=symmetric)
 
-                if winner != None:
-                    reward2 = -reward2
-                q_value = (1-alpha)*player.get_qvalue(state, action) + alpha*(reward2)
-                player.update_qvalue(q_value, state, action)
-            else:
-            
-                # Update Q
-                q_value = (1-alpha)*player.get_qvalue(state, action) + alpha*(reward2 + discount_factor*player.get_qvalue_max(n_state2))
-                player.update_qvalue(q_value, state, action)
-
-                state = n_state.copy()
-                n_state = n_state2.copy()
-
-                action = action2
-
-                reward = reward2
-
-            #game.render(screen)
-            #pygame.time.wait(1000)
+    if workers:
+        train_parallel(player, iterations, workers, sync_interval, seed, game_class)
+    elif batch_size:
+        from BatchTrainer import train_batch   # NumPy is only needed for the batch training
+        train_batch(player, iterations, batch_size, seed=seed)
+    else:
+        Training.train(player, iterations, game_class)
 
     player.write_qtable()
     print('The training has finished')
-    #print(player.Q_table)
 
 # Starts the API
 if __name__ == "__main__":
@@ -0,0 +1,387 @@
+"""A server of games against the AI (asyncio, TCP). Each line of the protocol is a JSON object.
+
+Requests (the optional 'id' is copied to the response, so the requests of a connection can be pipelined):
+    {"cmd": "new", "side": "X"}                  starts a game (side X or O of the human, X moves first)
+    {"cmd": "move", "session": 1, "position": 4} moves on a position (0 to 8), then the AI moves
+    {"cmd": "close", "session": 1}               finishes a game
+    {"cmd": "stats"}                             statistics of the server
+
+Responses:
+    {"session": 1, "board": [...], "turn": "X", "ai_move": 0, "done": false, "winner": null}
+    {"error": "..."}
+
+The games of a connection are closed when the connection is closed. A request longer than the limit of the
+reader (64 KiB by default) gets an error and its connection is closed.
+"""
+import asyncio
+import itertools
+import json
+
+import Constants
+from TicTacToeBitboard import CELL_WIN_MASKS, NUM_CELLS
+
+SYMBOLS = {'X': Constants.PLAYER1, 'O': Constants.PLAYER2}
+NAMES = {Constants.PLAYER1: 'X', Constants.PLAYER2: 'O'}
+
+class Session:
+    """
+    A game against the AI. The board is stored as two bitboards (see TicTacToeBitboard) and the session
+    has no __dict__, so thousands of sessions use little memory.
+
+    Attributes:
+    ----------
+    session_id : int
+        The identifier of the session
+    human : int
+        The player of the human (1 or 2)
+    x_bits, o_bits : int
+        The bitboards of the player1 and the player2
+    movements : int
+        Number of moves remaining in the game
+    winner : int or None
+        The player that has won
+    busy : boolean
+        Indicates if a movement of the session is being processed
+    """
+
+    __slots__ = ('session_id', 'human', 'x_bits', 'o_bits', 'movements', 'winner', 'busy')
+
+    def __init__(self, session_id, human):
+        self.session_id = session_id
+        self.human = human
+        self.x_bits = 0
+        self.o_bits = 0
+        self.movements = NUM_CELLS
+        self.winner = None
+        self.busy = False
+
+    @property
+    def done(self):
+        """Indicates if the game has finished."""
+        return self.movements == 0
+
+    @property
+    def turn(self):
+        """The player that moves (1 or 2)."""
+        return Constants.PLAYER1 if (NUM_CELLS - self.movements) % 2 == 0 else Constants.PLAYER2
+
+    def get_board(self):
+        """Get the board (same format as TicTacToe.get_board)."""
+        x_bits, o_bits = self.x_bits, self.o_bits
+        return [Constants.PLAYER1 if x_bits >> pos & 1 else Constants.PLAYER2 if o_bits >> pos & 1 else Constants.EMPTY
+            for pos in range(NUM_CELLS)]
+
+    def play(self, pos):
+        """Performs a movement of the player that moves.
+
+        Params:
+        ----------
+        pos : int
+            The position to move
+
+        Raises
+        ------
+        ValueError
+            If the game has finished or the position is not free
+        """
+        if self.done:
+            raise ValueError('The game has finished')
+        if not isinstance(pos, int) or isinstance(pos, bool) or not 0 <= pos < NUM_CELLS or (self.x_bits | self.o_bits) >> pos & 1:
+            raise ValueError('Invalid position: {}'.format(pos))
+        player = self.turn
+        if player == Constants.PLAYER1:
+            self.x_bits |= 1 << pos
+            bits = self.x_bits
+        else:
+            self.o_bits |= 1 << pos
+            bits = self.o_bits
+        self.movements -= 1
+        for mask in CELL_WIN_MASKS[pos]:
+            if bits & mask == mask:
+                self.winner = player
+                self.movements = 0
+                break
+
+    def to_response(self, ai_move=None):
+        """Gets the response with the state of the game."""
+        return {
+            'session': self.session_id,
+            'board': self.get_board(),
+            'turn': None if self.done else NAMES[self.turn],
+            'ai_move': ai_move,
+            'done': self.done,
+            'winner': NAMES.get(self.winner),
+        }
+
+class MoveBatcher:
+    """
+    Chooses the movements of the AI of many sessions at once: the requests that arrive within window
+    seconds (or until max_batch requests) are answered with one call to agent.movement_batch.
+
+    Attributes:
+    ----------
+    agent : AgentQLearning
+        The shared agent
+    window : float
+        Maximum seconds that a request waits for other requests
+    max_batch : int
+        Maximum number of boards of a batch
+    greedy : float
+        The probability of performing a random movement
+    batches : int
+        Number of batches
+    moves : int
+        Number of movements
+    """
+
+    def __init__(self, agent, window=0.002, max_batch=1024, greedy=0):
+        self.agent = agent
+        self.window = window
+        self.max_batch = max_batch
+        self.greedy = greedy
+        self.batches = 0
+        self.moves = 0
+        self._boards = []
+        self._futures = []
+        self._timer = None
+
+    async def movement(self, board):
+        """Gets the movement of the AI on a board (it waits for the batch).
+
+        Params:
+        ----------
+        board : list of int
+            The current board
+
+        Returns
+        -------
+        int
+            The position on the board
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._boards.append(board)
+        self._futures.append(future)
+        if len(self._boards) >= self.max_batch:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self.flush)
+        return await future
+
+    def flush(self):
+        """Chooses the movements of the pending requests."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        boards, futures = self._boards, self._futures
+        if not boards:
+            return
+        self._boards, self._futures = [], []
+        try:
+            actions = self.agent.movement_batch(boards, self.greedy).tolist()
+        except Exception as error:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        self.batches += 1
+        self.moves += len(boards)
+        for future, action in zip(futures, actions):
+            if not future.done():
+                future.set_result(action)
+
+class GameServer:
+    """
+    A server of games against a shared agent (see the protocol in the module documentation).
+
+    Attributes:
+    ----------
+    batcher : MoveBatcher
+        The batcher of the movements of the AI
+    max_sessions : int or None
+        Maximum number of open sessions (None for no limit)
+    sessions : int
+        Number of open sessions
+    """
+
+    def __init__(self, agent, window=0.002, max_batch=1024, greedy=0, max_sessions=None):
+        """Initializes the server.
+
+        Params:
+        ----------
+        agent : AgentQLearning
+            The agent that plays every game (it needs movement_batch)
+        window, max_batch, greedy :
+            See MoveBatcher
+        max_sessions : int or None
+            Maximum number of open sessions (None for no limit)
+        """
+        self.batcher = MoveBatcher(agent, window, max_batch, greedy)
+        self.max_sessions = max_sessions
+        self.sessions = 0
+        self.connections = 0
+        self._ids = itertools.count(1)
+
+    async def start(self, host='127.0.0.1', port=8765):
+        """Starts listening.
+
+        Returns
+        -------
+        asyncio.Server
+            The server (use serve_forever or close)
+        """
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    async def handle_connection(self, reader, writer):
+        """Serves the requests of a connection (each request runs on its own task). A request longer than the
+        limit of the reader gets an error and the connection is closed."""
+        sessions = {}
+        tasks = set()
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:    # The line is longer than the limit of the reader (LimitOverrunError)
+                    if tasks:
+                        await asyncio.gather(*tasks)
+                    writer.write(json.dumps({'error': 'The request is too long'}).encode() + b'\n')
+                    await writer.drain()
+                    break
+                if not line:
+                    break
+                task = asyncio.ensure_future(self._respond(line, sessions, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            self.sessions -= len(sessions)
+            sessions.clear()
+            writer.close()
+
+    async def _respond(self, line, sessions, writer):
+        """Serves a request and writes its response (every request gets a response, an error if it fails)."""
+        request = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError('The request must be a JSON object')
+            response = await self.dispatch(request, sessions)
+        except ValueError as error:    # json.JSONDecodeError is a ValueError
+            response = {'error': str(error)}
+        except Exception as error:     # For example, a failure of the agent
+            response = {'error': 'Internal error: {}'.format(error.__class__.__name__)}
+        if isinstance(request, dict) and 'id' in request:
+            response['id'] = request['id']
+        if not writer.is_closing():
+            writer.write(json.dumps(response).encode() + b'\n')
+            await writer.drain()
+
+    async def dispatch(self, request, sessions):
+        """Serves a request.
+
+        Params:
+        ----------
+        request : dict
+            The request
+        sessions : dict
+            The sessions of the connection. Key: session id. Value: Session
+
+        Returns
+        -------
+        dict
+            The response
+
+        Raises
+        ------
+        ValueError
+            If the request is not valid
+        """
+        command = request.get('cmd')
+        if command == 'new':
+            return await self._new_session(request, sessions)
+        if command == 'stats':
+            return self.stats()
+
+        session_id = request.get('session')
+        session = sessions.get(session_id) if isinstance(session_id, int) else None
+        if session is None:
+            raise ValueError('Unknown session: {}'.format(request.get('session')))
+        if command == 'move':
+            return await self._move(session, request.get('position'))
+        if command == 'close':
+            del sessions[session.session_id]
+            self.sessions -= 1
+            return {'session': session.session_id, 'closed': True}
+        raise ValueError('Unknown command: {}'.format(command))
+
+    async def _new_session(self, request, sessions):
+        """Starts a game (the AI moves first if the human is O)."""
+        side = request.get('side', 'X')
+        human = SYMBOLS.get(side) if isinstance(side, str) else None
+        if human is None:
+            raise ValueError('Invalid side: {}'.format(request.get('side')))
+        if self.max_sessions is not None and self.sessions >= self.max_sessions:
+            raise ValueError('Too many sessions')
+        session = Session(next(self._ids), human)
+        sessions[session.session_id] = session
+        self.sessions += 1
+        ai_move = None
+        if human != Constants.PLAYER1:
+            session.busy = True
+            try:
+                ai_move = await self.batcher.movement(session.get_board())
+                session.play(ai_move)
+            except Exception:
+                # The game is not started (the client does not get its session)
+                if sessions.pop(session.session_id, None) is not None:
+                    self.sessions -= 1
+                raise
+            finally:
+                session.busy = False
+        return session.to_response(ai_move)
+
+    async def _move(self, session, position):
+        """Performs the movement of the human and the answer of the AI."""
+        if session.busy:
+            raise ValueError('The previous movement of the session has not finished')
+        if session.turn != session.human:
+            raise ValueError('It is not the turn of the human')
+        previous = (session.x_bits, session.o_bits, session.movements, session.winner)
+        session.play(position)
+        ai_move = None
+        if not session.done:
+            session.busy = True
+            try:
+                ai_move = await self.batcher.movement(session.get_board())
+                session.play(ai_move)
+            except Exception:
+                # The movement of the human is undone, so it can be sent again
+                session.x_bits, session.o_bits, session.movements, session.winner = previous
+                raise
+            finally:
+                session.busy = False
+        return session.to_response(ai_move)
+
+    def stats(self):
+        """Gets the statistics of the server."""
+        batcher = self.batcher
+        return {
+            'connections': self.connections,
+            'sessions': self.sessions,
+            'moves': batcher.moves,
+            'batches': batcher.batches,
+            'mean_batch': batcher.moves/batcher.batches if batcher.batches else 0.0,
+        }
+
+async def serve(agent, host='127.0.0.1', port=8765, window=0.002, max_batch=1024, greedy=0, max_sessions=None):
+    """Runs a server until it is cancelled (see GameServer)."""
+    game_server = GameServer(agent, window, max_batch, greedy, max_sessions)
+    server = await game_server.start(host, port)
+    print('Serving games on', ', '.join(str(sock.getsockname()) for sock in server.sockets))
+    async with server:
+        await server.serve_forever()
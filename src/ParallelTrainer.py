@@ -0,0 +1,145 @@
+import random
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+import Constants
+import Training
+from AgentQLearning import AgentQLearning
+from QTable import QTable
+from TicTacToeCompact import TicTacToeCompact
+
+class CountingQTable(QTable):
+    """
+    A q table that counts the updates of each q value since it was created.
+
+    Attributes:
+    ----------
+    counts : array of int
+        counts[s*num_actions + a] is the number of updates of the action a in the state s
+    """
+
+    def __init__(self, num_actions):
+        super().__init__(num_actions)
+        self.counts = array('I', bytes(4*self.num_states*num_actions))
+
+    def set(self, state, action, value):
+        super().set(state, action, value)
+        self.counts[state*self.num_actions + action] += 1
+
+def worker_seed(seed, sync_round, worker, workers):
+    """Gets the seed of a worker in a synchronization round.
+
+    Params:
+    ----------
+    seed : int
+        The seed of the training
+    sync_round : int
+        The synchronization round
+    worker : int
+        The index of the worker
+    workers : int
+        Number of workers
+
+    Returns
+    -------
+    int
+        The seed
+    """
+    return seed*1000003 + sync_round*workers + worker
+
+def _train_shard(values, visited, num_actions, symmetric, iterations, seed, game_class, alpha, discount_factor, greedy):
+    """Trains a local copy of the q table (it runs on a worker process).
+
+    Params:
+    ----------
+    values : bytes
+        The q values of the master table
+    visited : bytes
+        The visited states of the master table
+    num_actions : int
+        Number of actions of the table
+    symmetric : boolean
+        Indicates if the table is symmetric (see AgentQLearning)
+    iterations : int
+        Number of games of training
+    seed : int
+        The seed of the random generator
+    game_class, alpha, discount_factor, greedy :
+        See Training.train
+
+    Returns
+    -------
+    list of (int, int, float)
+        The updated q values: (index in QTable.values, number of updates, new value)
+    """
+    random.seed(seed)
+    table = CountingQTable(num_actions)
+    table.values[:] = array(QTable.TYPECODE, values)
+    table.visited[:] = visited
+    player = AgentQLearning(symmetric=symmetric, Q_table=table)
+    Training.train(player, iterations, game_class, alpha, discount_factor, greedy)
+    return [(index, count, table.values[index]) for index, count in enumerate(table.counts) if count]
+
+def merge_updates(table, shard_updates):
+    """Merges the updates of the workers into the master table. Each q value is the average of the
+    workers values weighted by the number of updates of each worker.
+
+    Params:
+    ----------
+    table : QTable
+        The master table (updated in place)
+    shard_updates : list of list of (int, int, float)
+        The updates of each worker (see _train_shard)
+    """
+    totals = {}
+    for updates in shard_updates:
+        for index, count, value in updates:
+            total = totals.get(index)
+            if total is None:
+                totals[index] = [count, count*value]
+            else:
+                total[0] += count
+                total[1] += count*value
+    for index, (count, weighted) in totals.items():
+        state, action = divmod(index, table.num_actions)
+        table.set(state, action, weighted/count)
+
+def train_parallel(player, iterations, workers=4, sync_interval=5000, seed=0, game_class=TicTacToeCompact,
+        alpha=Constants.ALPHA, discount_factor=Constants.DISCOUNT_FACTOR, greedy=Constants.GREEDY):
+    """Trains the agent on several processes. Each worker trains a local copy of the q table for
+    sync_interval games, then the copies are merged into the table of the agent (see merge_updates)
+    and sent again to the workers.
+
+    Params:
+    ----------
+    player : AgentQLearning
+        The agent to train. Its q table is updated in place
+    iterations : int
+        Number of games of training (in total)
+    workers : int
+        Number of worker processes
+    sync_interval : int
+        Number of games that each worker plays between merges
+    seed : int
+        The seed of the training. Each worker uses a different seed in each round (see worker_seed)
+    game_class, alpha, discount_factor, greedy :
+        See Training.train
+    """
+    table = player.Q_table
+    sync_round = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while iterations > 0:
+            shard_iterations = []
+            for worker in range(workers):
+                shard = min(sync_interval, iterations)
+                if shard == 0:
+                    break
+                shard_iterations.append(shard)
+                iterations -= shard
+
+            values, visited = table.values.tobytes(), bytes(table.visited)
+            futures = [executor.submit(_train_shard, values, visited, table.num_actions, player.symmetric, shard,
+                    worker_seed(seed, sync_round, worker, workers), game_class, alpha, discount_factor, greedy)
+                for worker, shard in enumerate(shard_iterations)]
+            merge_updates(table, [future.result() for future in futures])
+            sync_round += 1
@@ -1,6 +1,50 @@
 import pygame
 
 import Constants
+from TicTacToe import CELL_RECTS
+
+# Hit-test index built once: the ranges (start, end) of the columns and of the rows on the screen
+COLUMN_RANGES = tuple((x, x + width) for (x, y, width, height) in CELL_RECTS[:Constants.NUM_COLUMNS])
+ROW_RANGES = tuple((y, y + height) for (x, y, width, height) in CELL_RECTS[::Constants.NUM_COLUMNS])
+
+def _find_range(value, ranges):
+    """Finds the range that contains a value.
+
+    Params:
+    ----------
+    value : int
+        The value
+    ranges : tuple of (int, int)
+        The ranges (start, end)
+
+    Returns
+    -------
+    int or None
+        The index of the range or None if no range contains the value
+    """
+    for index, (start, end) in enumerate(ranges):
+        if start < value and value < end:
+            return index
+    return None
+
+def get_position(screen_position):
+    """Gets the position on the board under a point of the screen.
+
+    Params:
+    ----------
+    screen_position : (int, int)
+        The point on the screen (x, y)
+
+    Returns
+    -------
+    int or None
+        The position on the board (0 to 8) or None if the point is not on a position
+    """
+    column = _find_range(screen_position[0], COLUMN_RANGES)
+    row = _find_range(screen_position[1], ROW_RANGES)
+    if column is None or row is None:
+        return None
+    return row*Constants.NUM_COLUMNS + column
 
 class Player:
     """A class used to represent a human player."""
@@ -19,27 +63,16 @@ class Player:
             The position on the board where performs a movement (0 to 8)
         """
         while True:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    exit()
-
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    current_pos = pygame.mouse.get_pos()
-
-                    for i in range(Constants.NUM_COLUMNS*Constants.NUM_ROWS):
-                        num_column = int(i%Constants.NUM_COLUMNS)
-                        x = Constants.MARGIN + num_column*(Constants.PART_SIZE + Constants.STICK_WIDTH + 2*Constants.PART_MARGIN)
-                        limit_x = x+Constants.PART_SIZE+2*Constants.PART_MARGIN
-
-                        num_row =  int(i/Constants.NUM_ROWS)
-                        y = Constants.PLUS + Constants.MARGIN + num_row*(Constants.PART_SIZE + Constants.STICK_WIDTH + 2*Constants.PART_MARGIN)
-                        limit_y = y+Constants.PART_SIZE+2*Constants.PART_MARGIN
-                        
-                        # If player click some valid position
-                        if x<current_pos[0] and current_pos[0]<limit_x and y<current_pos[1] and current_pos[1]<limit_y:
-                            if self._check_if_position_is_free(i, state): # If the position is free
-                                return i
+            event = pygame.event.wait()   # Sleeps until there is an event
+            if event.type == pygame.QUIT:
+                exit()
+
+            if event.type == pygame.MOUSEBUTTONDOWN:
+                position = get_position(event.pos)
 
+                # If player click some valid position
+                if position is not None and self._check_if_position_is_free(position, state): # If the position is free
+                    return position
 
     def _check_if_position_is_free(self, position, board):
         """Check if position on the board is free.
@@ -0,0 +1,586 @@
+import mmap
+import os
+import pickle
+import struct
+import sys
+from array import array
+from collections import OrderedDict
+from operator import mul
+
+import Constants
+
+NUM_CELLS = Constants.NUM_ROWS*Constants.NUM_COLUMNS
+NUM_STATES = 3**NUM_CELLS   # Each position can be empty, player1 or player2
+POWERS = tuple(3**i for i in range(NUM_CELLS))
+# Powers of other board sizes (see get_powers)
+_powers = {NUM_CELLS: POWERS}
+
+# Binary format: header | values (float32, little endian) | visited (1 byte per state)
+# Header: magic, version, number of actions, number of states, typecode of the values
+BINARY_MAGIC = b'QTBL'
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct('<4sHHIc3x')
+
+class QTableFormatError(ValueError):
+    """The file does not have a valid binary q table."""
+
+def encode_state(board):
+    """Encodes a board as a base-3 integer (position i is the digit i).
+
+    Params:
+    ----------
+    board : list of int
+        The board
+
+    Returns
+    -------
+    int
+        The state (0 to 3^9 - 1)
+    """
+    powers = POWERS if len(board) == NUM_CELLS else get_powers(len(board))
+    return sum(map(mul, board, powers))
+
+def get_powers(num_cells):
+    """Gets the powers of 3 used to encode the boards with num_cells positions (see encode_state)."""
+    powers = _powers.get(num_cells)
+    if powers is None:
+        powers = _powers[num_cells] = tuple(3**i for i in range(num_cells))
+    return powers
+
+def decode_state(state, num_cells=NUM_CELLS):
+    """Decodes a base-3 integer state to a board.
+
+    Params:
+    ----------
+    state : int
+        The state
+    num_cells : int
+        Number of positions of the board
+
+    Returns
+    -------
+    list of int
+        The board
+    """
+    board = []
+    for _ in range(num_cells):
+        state, value = divmod(state, 3)
+        board.append(value)
+    return board
+
+def legal_mask(board):
+    """Gets the legal movements of a board as a bit mask.
+
+    Params:
+    ----------
+    board : list of int
+        The board
+
+    Returns
+    -------
+    int
+        Bit i is set if the position i is free
+    """
+    mask = 0
+    for index, value in enumerate(board):
+        if value == Constants.EMPTY:
+            mask |= 1 << index
+    return mask
+
+class QTable:
+    """
+    A dense q table indexed by the encoded state (see encode_state).
+
+    Attributes:
+    ----------
+    num_actions : int
+        Number of actions (positions of the board)
+    num_states : int
+        Number of states (3^num_actions)
+    values : array of float (or memoryview of a memory-mapped file, see read_binary)
+        The q values. The value of the action a in the state s is values[s*num_actions + a]
+    visited : bytearray
+        visited[s] is 1 if the state s has been updated at least once
+    """
+
+    TYPECODE = 'f'
+
+    def __init__(self, num_actions=NUM_CELLS, values=None, visited=None):
+        """Initializes a q table (empty if values and visited are not set).
+
+        Params:
+        ----------
+        num_actions : int
+            Number of actions (positions of the board)
+        values : array of float or memoryview or None
+            The q values
+        visited : bytearray or None
+            The visited states
+        """
+        self.num_actions = num_actions
+        self.num_states = 3**num_actions
+        if values is None:
+            values = array(self.TYPECODE, bytes(self.num_states*num_actions*array(self.TYPECODE).itemsize))
+        if visited is None:
+            visited = bytearray(self.num_states)
+        self.values = values
+        self.visited = visited
+
+    def __contains__(self, state):
+        return self.visited[state] == 1
+
+    def __len__(self):
+        return self.visited.count(1)
+
+    def get(self, state, action):
+        """Gets the q value (0 if it has never been updated).
+
+        Params:
+        ----------
+        state : int
+            The encoded state
+        action : int
+            The action
+
+        Returns
+        -------
+        float
+            The q value
+        """
+        return self.values[state*self.num_actions + action]
+
+    def set(self, state, action, value):
+        """Sets the q value.
+
+        Params:
+        ----------
+        state : int
+            The encoded state
+        action : int
+            The action
+        value : float
+            The new q value
+        """
+        self.visited[state] = 1
+        self.values[state*self.num_actions + action] = value
+
+    def best_action(self, state, actions):
+        """Gets the action with the maximum q value. Ties are resolved with the first action.
+
+        Params:
+        ----------
+        state : int
+            The encoded state
+        actions : list of int
+            The legal actions
+
+        Returns
+        -------
+        int
+            The best action
+        """
+        values, base = self.values, state*self.num_actions
+        return max(actions, key=lambda action: values[base + action])
+
+    def best_action_value(self, state, actions):
+        """Gets the action with the maximum q value and its q value with one lookup. Ties are resolved with the first action.
+
+        Params:
+        ----------
+        state : int
+            The encoded state
+        actions : list of int
+            The legal actions
+
+        Returns
+        -------
+        (int or None, float)
+            The best action and its q value (None and 0 if there are no actions)
+        """
+        values, base = self.values, state*self.num_actions
+        best_action, best_value = None, 0.0
+        for action in actions:
+            value = values[base + action]
+            if best_action is None or value > best_value:
+                best_action, best_value = action, value
+        return best_action, best_value
+
+    def memory_usage(self):
+        """Gets the memory used by the table.
+
+        Returns
+        -------
+        int
+            The number of bytes used by the values and the visited states
+        """
+        return self.values.itemsize*len(self.values) + len(self.visited)
+
+    def to_dict(self):
+        """Converts the table to the legacy format (dict of dicts with str states).
+
+        Returns
+        -------
+        dict
+            - Key: state (str). Example: '000001002'
+            - Value: dict
+                - Key: actions (free positions)
+                - Value: value
+        """
+        Q_table = {}
+        for state in range(self.num_states):
+            if self.visited[state]:
+                board = decode_state(state, self.num_actions)
+                base = state*self.num_actions
+                Q_table[''.join(str(x) for x in board)] = {
+                    action: self.values[base + action] for action, value in enumerate(board) if value == Constants.EMPTY
+                }
+        return Q_table
+
+    @classmethod
+    def from_dict(cls, Q_table):
+        """Creates a table from the legacy format (dict of dicts with str states).
+
+        Params:
+        ----------
+        Q_table : dict
+            The legacy q table
+
+        Returns
+        -------
+        QTable
+            The new table
+        """
+        num_actions = len(next(iter(Q_table))) if Q_table else NUM_CELLS
+        table = cls(num_actions)
+        powers = [3**i for i in range(num_actions)]
+        for key, actions in Q_table.items():
+            state = sum(int(x)*power for x, power in zip(key, powers))
+            for action, value in actions.items():
+                table.set(state, action, value)
+        return table
+
+    def write_binary(self, file):
+        """Writes the table to a file with the binary format (see read_binary). The table is written to
+        a temporary file that replaces the file at the end, so the processes that have mapped the old file
+        keep reading it.
+
+        Params:
+        ----------
+        file : str
+            The file where writes the table
+        """
+        values = self.values
+        if sys.byteorder != 'little':
+            values = array(self.TYPECODE, values)
+            values.byteswap()
+        temp_file = file + '.tmp'
+        with open(temp_file, 'wb') as handle:
+            handle.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, self.num_actions, self.num_states, self.TYPECODE.encode()))
+            handle.write(values)
+            handle.write(self.visited)
+        os.replace(temp_file, file)
+
+    @classmethod
+    def read_binary(cls, file, writable=True):
+        """Reads a table from a file with the binary format. The values are not copied: they are
+        a view of the memory-mapped file, so the processes that read the same file share its pages.
+
+        Params:
+        ----------
+        file : str
+            The file with the table
+        writable : boolean
+            If it is True, the values can be updated (copy on write, the file is not modified).
+            If it is False, updating the values raises a TypeError
+
+        Returns
+        -------
+        QTable
+            The table
+        """
+        with open(file, 'rb') as handle:
+            data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_COPY if writable else mmap.ACCESS_READ)
+        if len(data) < BINARY_HEADER.size:
+            raise QTableFormatError('Truncated q table file: ' + file)
+        magic, version, num_actions, num_states, typecode = BINARY_HEADER.unpack_from(data)
+        if magic != BINARY_MAGIC or version != BINARY_VERSION or typecode != cls.TYPECODE.encode() or num_states != 3**num_actions:
+            raise QTableFormatError('Invalid q table file: ' + file)
+        start = BINARY_HEADER.size
+        end = start + num_states*num_actions*array(cls.TYPECODE).itemsize
+        if len(data) != end + num_states:
+            raise QTableFormatError('Truncated q table file: ' + file)
+
+        if sys.byteorder == 'little':
+            values = memoryview(data)[start:end].cast(cls.TYPECODE)
+        else:
+            values = array(cls.TYPECODE, data[start:end])
+            values.byteswap()
+        return cls(num_actions, values, bytearray(data[end:]))
+
+class SparseQTable:
+    """
+    A q table that only stores the visited states, for boards whose dense table does not fit in memory
+    (see QTable). It has the same interface as QTable except the binary format.
+
+    The q values of each state are stored in a slot of num_actions consecutive values of one array.
+    The slots are allocated when a state is updated for the first time. If max_states is set, the table
+    never has more states: the least recently used state (updated or looked up with best_action) is
+    evicted and its slot is reused.
+
+    Attributes:
+    ----------
+    num_actions : int
+        Number of actions (positions of the board)
+    num_states : int
+        Number of possible states (3^num_actions)
+    max_states : int or None
+        Maximum number of stored states (None for no limit)
+    values : array of float
+        The q values. The value of the action a in the slot i is values[i*num_actions + a]
+    evictions : int
+        Number of states evicted
+    """
+
+    TYPECODE = 'f'
+    # Approximate bytes used by each state besides its values (entry of the slots dict, state and slot integers)
+    STATE_OVERHEAD = 240
+
+    def __init__(self, num_actions=NUM_CELLS, max_states=None, max_bytes=None):
+        """Initializes an empty table.
+
+        Params:
+        ----------
+        num_actions : int
+            Number of actions (positions of the board)
+        max_states : int or None
+            Maximum number of stored states (None for no limit)
+        max_bytes : int or None
+            Approximate maximum memory of the table. It limits the number of states too
+        """
+        self.num_actions = num_actions
+        self.num_states = 3**num_actions
+        if max_bytes is not None:
+            states = max(1, max_bytes//(num_actions*array(self.TYPECODE).itemsize + self.STATE_OVERHEAD))
+            max_states = states if max_states is None else min(max_states, states)
+        self.max_states = max_states
+        self.values = array(self.TYPECODE)
+        self.evictions = 0
+        self._slots = OrderedDict()   # Key: state. Value: slot. From the least to the most recently used
+        self._empty_slot = array(self.TYPECODE, bytes(num_actions*array(self.TYPECODE).itemsize))
+
+    def __contains__(self, state):
+        return state in self._slots
+
+    def __len__(self):
+        return len(self._slots)
+
+    def get(self, state, action):
+        """Gets the q value (0 if the state is not stored).
+
+        Params:
+        ----------
+        state : int
+            The encoded state
+        action : int
+            The action
+
+        Returns
+        -------
+        float
+            The q value
+        """
+        slot = self._slots.get(state)
+        if slot is None:
+            return 0.0
+        return self.values[slot*self.num_actions + action]
+
+    def set(self, state, action, value):
+        """Sets the q value. If the state is not stored and the table is full, the least recently used state is evicted.
+
+        Params:
+        ----------
+        state : int
+            The encoded state
+        action : int
+            The action
+        value : float
+            The new q value
+        """
+        slot = self._slots.get(state)
+        if slot is None:
+            slot = self._allocate(state)
+        else:
+            self._slots.move_to_end(state)
+        self.values[slot*self.num_actions + action] = value
+
+    def _allocate(self, state):
+        """Allocates the slot of a new state (the slot of the least recently used state if the table is full)."""
+        slots = self._slots
+        if self.max_states is not None and len(slots) >= self.max_states:
+            _, slot = slots.popitem(last=False)
+            start = slot*self.num_actions
+            self.values[start:start + self.num_actions] = self._empty_slot
+            self.evictions += 1
+        else:
+            slot = len(slots)
+            self.values.extend(self._empty_slot)
+        slots[state] = slot
+        return slot
+
+    def best_action(self, state, actions):
+        """Gets the action with the maximum q value. Ties are resolved with the first action.
+
+        Params:
+        ----------
+        state : int
+            The encoded state (it must be stored)
+        actions : list of int
+            The legal actions
+
+        Returns
+        -------
+        int
+            The best action
+        """
+        slots = self._slots
+        slots.move_to_end(state)
+        values, base = self.values, slots[state]*self.num_actions
+        return max(actions, key=lambda action: values[base + action])
+
+    def best_action_value(self, state, actions):
+        """Gets the action with the maximum q value and its q value with one lookup. Ties are resolved with the first action.
+
+        Params:
+        ----------
+        state : int
+            The encoded state (it must be stored)
+        actions : list of int
+            The legal actions
+
+        Returns
+        -------
+        (int or None, float)
+            The best action and its q value (None and 0 if there are no actions)
+        """
+        slots = self._slots
+        slots.move_to_end(state)
+        values, base = self.values, slots[state]*self.num_actions
+        best_action, best_value = None, 0.0
+        for action in actions:
+            value = values[base + action]
+            if best_action is None or value > best_value:
+                best_action, best_value = action, value
+        return best_action, best_value
+
+    def memory_usage(self):
+        """Gets the memory used by the table.
+
+        Returns
+        -------
+        int
+            The number of bytes used by the values and the slots dict (including its integers)
+        """
+        integers = len(self._slots)*(sys.getsizeof(self.num_states - 1) + sys.getsizeof(len(self._slots)))
+        return self.values.itemsize*len(self.values) + sys.getsizeof(self._slots) + integers
+
+    def to_dict(self):
+        """Converts the table to the legacy format (see QTable.to_dict).
+
+        Returns
+        -------
+        dict
+            The legacy q table
+        """
+        Q_table = {}
+        for state, slot in self._slots.items():
+            board = decode_state(state, self.num_actions)
+            base = slot*self.num_actions
+            Q_table[''.join(str(x) for x in board)] = {
+                action: self.values[base + action] for action, value in enumerate(board) if value == Constants.EMPTY
+            }
+        return Q_table
+
+    @classmethod
+    def from_dict(cls, Q_table, max_states=None):
+        """Creates a table from the legacy format (dict of dicts with str states).
+
+        Params:
+        ----------
+        Q_table : dict
+            The legacy q table
+        max_states : int or None
+            Maximum number of stored states (None for no limit)
+
+        Returns
+        -------
+        SparseQTable
+            The new table
+        """
+        num_actions = len(next(iter(Q_table))) if Q_table else NUM_CELLS
+        table = cls(num_actions, max_states)
+        powers = get_powers(num_actions)
+        for key, actions in Q_table.items():
+            state = sum(int(x)*power for x, power in zip(key, powers))
+            for action, value in actions.items():
+                table.set(state, action, value)
+        return table
+
+    def write_binary(self, file):
+        """The binary format is dense, so it is not available for a sparse table (use the legacy format)."""
+        raise QTableFormatError('The binary format needs a dense q table: ' + file)
+
+def is_binary_file(file):
+    """Checks if a file has a q table with the binary format.
+
+    Params:
+    ----------
+    file : str
+        The file
+
+    Returns
+    -------
+    boolean
+        True if the file starts with the binary format magic
+    """
+    with open(file, 'rb') as handle:
+        return handle.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+def read_table(file, writable=True):
+    """Reads a table from a file with the binary format or the legacy format (pickle of a dict of dicts).
+
+    Params:
+    ----------
+    file : str
+        The file with the table
+    writable : boolean
+        See QTable.read_binary (a table with the legacy format is always writable)
+
+    Returns
+    -------
+    QTable or SparseQTable
+        The table (sparse if it is a legacy table of a board bigger than NUM_ROWS x NUM_COLUMNS)
+    """
+    if is_binary_file(file):
+        return QTable.read_binary(file, writable)
+    with open(file, 'rb') as handle:
+        Q_table = pickle.load(handle)
+    if Q_table and len(next(iter(Q_table))) > NUM_CELLS:
+        return SparseQTable.from_dict(Q_table)  # The dense table of a bigger board does not fit in memory
+    return QTable.from_dict(Q_table)
+
+def write_table(table, file):
+    """Writes a table to a file. The format depends on the extension of the file:
+    Constants.QTABLE_BINARY_EXTENSION for the binary format, the legacy format (pickle) in other case.
+
+    Params:
+    ----------
+    table : QTable or SparseQTable
+        The table (a SparseQTable can only be written with the legacy format)
+    file : str
+        The file where writes the table
+    """
+    if file.endswith(Constants.QTABLE_BINARY_EXTENSION):
+        table.write_binary(file)
+    else:
+        with open(file, 'wb') as handle:
+            pickle.dump(table.to_dict(), handle, protocol=pickle.HIGHEST_PROTOCOL)
@@ -0,0 +1,172 @@
+import random
+from array import array
+
+import Constants
+from QTable import NUM_CELLS, QTable, decode_state
+
+class ReplayBuffer:
+    """
+    A ring buffer of the transitions (state, action, reward, next state, done) played in the training
+    (see Training.train). The transitions are stored in preallocated arrays with the encoded states
+    (see QTable.encode_state), so a transition does not create any Python object. When the buffer is full
+    the oldest transitions are replaced.
+
+    Every interval episodes, a random minibatch of batch_size transitions is applied again to the agent
+    (see replay), so the rewards reach the previous states in fewer games.
+
+    Attributes:
+    ----------
+    capacity : int
+        Maximum number of transitions
+    batch_size : int
+        Number of transitions of each minibatch
+    interval : int
+        Number of episodes between minibatches
+    num_cells : int
+        Number of positions of the boards
+    size : int
+        Number of stored transitions
+    """
+
+    def __init__(self, capacity=100000, batch_size=64, interval=1, num_cells=NUM_CELLS, seed=None):
+        """Initializes the buffer (empty).
+
+        Params:
+        ----------
+        capacity : int
+            Maximum number of transitions
+        batch_size : int
+            Number of transitions of each minibatch
+        interval : int
+            Number of episodes between minibatches
+        num_cells : int
+            Number of positions of the boards (at most 40, the states are stored as 64 bit integers)
+        seed : int or None
+            The seed of the generator of the minibatches
+
+        Raises
+        ------
+        ValueError
+            If the boards have more than 40 positions
+        """
+        if num_cells > 40:
+            raise ValueError('The states of a board with {} positions do not fit in 64 bits'.format(num_cells))
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.interval = interval
+        self.num_cells = num_cells
+        self.states = array('Q', bytes(8*capacity))
+        self.actions = array('B', bytes(capacity))
+        self.rewards = array('f', bytes(4*capacity))
+        self.next_states = array('Q', bytes(8*capacity))
+        self.dones = bytearray(capacity)
+        self.size = 0
+        self._next = 0
+        self._rng = random.Random(seed)
+
+    def __len__(self):
+        return self.size
+
+    def memory_usage(self):
+        """Gets the memory used by the arrays of the transitions.
+
+        Returns
+        -------
+        int
+            The number of bytes
+        """
+        return sum(memoryview(values).nbytes for values in (self.states, self.actions, self.rewards, self.next_states, self.dones))
+
+    def add(self, state, action, reward, next_state, done):
+        """Stores a transition.
+
+        Params:
+        ----------
+        state : int
+            The encoded state where the action is performed
+        action : int
+            The action
+        reward : float
+            The reward of the action
+        next_state : int
+            The encoded state where the same player moves again (ignored if done)
+        done : boolean
+            Indicates if the game has finished after the action (the value of the next state is 0)
+        """
+        index = self._next
+        self.states[index] = state
+        self.actions[index] = action
+        self.rewards[index] = reward
+        self.next_states[index] = 0 if done else next_state
+        self.dones[index] = done
+        self._next = (index + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+
+    def sample(self, batch_size=None):
+        """Chooses a random minibatch of transitions (with replacement).
+
+        Params:
+        ----------
+        batch_size : int or None
+            Number of transitions (self.batch_size if it is None)
+
+        Returns
+        -------
+        list of int
+            The indexes of the transitions
+        """
+        size, randrange = self.size, self._rng.randrange
+        return [randrange(size) for _ in range(batch_size or self.batch_size)]
+
+    def replay(self, player, alpha=Constants.ALPHA, discount_factor=Constants.DISCOUNT_FACTOR):
+        """Applies a random minibatch of transitions to the agent with the update of the qlearning.
+        If the agent has a dense q table without symmetries the minibatch is applied at once with NumPy
+        (when several transitions update the same state and action only one of the updates is kept).
+
+        Params:
+        ----------
+        player : AgentQLearning or AgentLinear
+            The agent
+        alpha : float
+            The learning rate
+        discount_factor : float
+            The discount factor
+        """
+        if self.size == 0:
+            return
+        indexes = self.sample()
+        table = getattr(player, 'Q_table', None)
+        if isinstance(table, QTable) and table.num_actions == NUM_CELLS and not player.symmetric:
+            self._replay_table(table, indexes, alpha, discount_factor)
+            return
+
+        num_cells = self.num_cells
+        for index in indexes:
+            board = decode_state(self.states[index], num_cells)
+            action = self.actions[index]
+            target = self.rewards[index]
+            if not self.dones[index]:
+                target += discount_factor*player.get_qvalue_max(decode_state(self.next_states[index], num_cells))
+            q_value = (1-alpha)*player.get_qvalue(board, action) + alpha*target
+            player.update_qvalue(q_value, board, action)
+
+    def _replay_table(self, table, indexes, alpha, discount_factor):
+        """Applies a minibatch of transitions to a dense q table at once (see replay)."""
+        import numpy as np
+        from BatchTrainer import POWERS_VECTOR, qvalues_max, table_arrays
+
+        Q_values, visited = table_arrays(table)
+        indexes = np.array(indexes)
+        s = np.frombuffer(self.states, dtype=np.uint64)[indexes].astype(np.int64)
+        a = np.frombuffer(self.actions, dtype=np.uint8)[indexes]
+        targets = np.frombuffer(self.rewards, dtype=np.float32)[indexes].astype(np.float64)
+
+        running = np.frombuffer(self.dones, dtype=np.uint8)[indexes] == 0
+        if running.any():
+            s2 = np.frombuffer(self.next_states, dtype=np.uint64)[indexes[running]].astype(np.int64)
+            legal = s2[:, None]//POWERS_VECTOR % 3 == Constants.EMPTY
+            targets[running] += discount_factor*qvalues_max(Q_values, visited, s2, legal)
+
+        Q_values[s, a] = (1-alpha)*Q_values[s, a] + alpha*targets
+        visited[s] = 1
@@ -0,0 +1,191 @@
+import random
+
+import Constants
+from QTable import QTable, POWERS, encode_state, decode_state
+from TicTacToeBitboard import CELL_WIN_MASKS, NUM_CELLS
+
+# The solution: scores of the actions of every reachable state where the game has not finished (see solve)
+_scores = None
+# The best action of every state of the solution
+_best_actions = None
+
+def _win(bits, pos):
+    """Checks if a player has won after moving to a position (see TicTacToeBitboard._wins_after)."""
+    for mask in CELL_WIN_MASKS[pos]:
+        if bits & mask == mask:
+            return True
+    return False
+
+def _negamax(own, other, state, own_symbol, scores):
+    """Computes the scores of the actions of a state and of every state reachable from it.
+
+    Params:
+    ----------
+    own : int
+        The bitboard of the player that moves
+    other : int
+        The bitboard of the other player
+    state : int
+        The encoded state (see QTable.encode_state)
+    own_symbol : int
+        The player that moves (1 or 2)
+    scores : dict
+        The transposition table (updated in place). Key: state. Value: the scores of the actions
+
+    Returns
+    -------
+    int
+        The score of the state for the player that moves
+    """
+    state_scores = scores.get(state)
+    if state_scores is not None:
+        return max(score for score in state_scores if score is not None)
+
+    occupied = own | other
+    free = NUM_CELLS - bin(occupied).count('1')
+    state_scores = [None]*NUM_CELLS
+    for pos in range(NUM_CELLS):
+        if occupied >> pos & 1:
+            continue
+        bits = own | 1 << pos
+        if _win(bits, pos):
+            state_scores[pos] = free    # Faster wins have greater scores
+        elif free == 1:
+            state_scores[pos] = 0
+        else:
+            state_scores[pos] = -_negamax(other, bits, state + own_symbol*POWERS[pos], 3 - own_symbol, scores)
+    scores[state] = tuple(state_scores)
+    return max(score for score in state_scores if score is not None)
+
+def solve():
+    """Solves the game with negamax (only the first time, then the solution is reused).
+
+    Returns
+    -------
+    dict
+        - Key: state (see QTable.encode_state) of every reachable board where the game has not finished
+        - Value: tuple with the score of each position (None if it is not free). The score is positive
+          if the player that moves wins with perfect play (greater if it wins faster), 0 if it is a tie
+          and negative if it loses
+    """
+    global _scores, _best_actions
+    if _scores is None:
+        scores = {}
+        _negamax(0, 0, 0, Constants.PLAYER1, scores)
+        _best_actions = {state: max((pos for pos, score in enumerate(state_scores) if score is not None), key=state_scores.__getitem__)
+            for state, state_scores in scores.items()}
+        _scores = scores
+    return _scores
+
+def best_action(board):
+    """Gets the best action of a board (the fastest win or the slowest loss).
+
+    Params:
+    ----------
+    board : list of int
+        The current board (a reachable board where the game has not finished)
+
+    Returns
+    -------
+    int
+        The position on the board (0 to 8)
+    """
+    solve()
+    return _best_actions[encode_state(board)]
+
+def optimal_actions(board):
+    """Gets the actions of a board that keep the result of the game with perfect play (win, tie or loss).
+
+    Params:
+    ----------
+    board : list of int
+        The current board (a reachable board where the game has not finished)
+
+    Returns
+    -------
+    list of int
+        The positions on the board
+    """
+    return _optimal_actions(solve()[encode_state(board)])
+
+def _optimal_actions(state_scores):
+    """Gets the actions with the same result as the best action."""
+    best = max(score for score in state_scores if score is not None)
+    sign = (best > 0) - (best < 0)
+    return [pos for pos, score in enumerate(state_scores) if score is not None and (score > 0) - (score < 0) == sign]
+
+def to_qtable():
+    """Builds a q table with the scores of the solution, so an AgentQLearning with it plays perfectly.
+
+    Returns
+    -------
+    QTable
+        The table. The q value of each action is its score multiplied by Constants.REWARD_WIN
+    """
+    table = QTable()
+    for state, state_scores in solve().items():
+        for pos, score in enumerate(state_scores):
+            if score is not None:
+                table.set(state, pos, score*Constants.REWARD_WIN)
+    return table
+
+def evaluate_agent(agent):
+    """Compares the greedy movements of an agent with the solution.
+
+    Params:
+    ----------
+    agent :
+        An agent with a movement(board, greedy) method (for example AgentQLearning)
+
+    Returns
+    -------
+    float
+        The fraction of reachable boards where the agent performs an optimal action (see optimal_actions)
+    """
+    scores = solve()
+    optimal = 0
+    for state, state_scores in scores.items():
+        if agent.movement(decode_state(state), 0) in _optimal_actions(state_scores):
+            optimal += 1
+    return optimal/len(scores)
+
+class SolverPlayer:
+    """A class used to represent a perfect player. It looks up the best action in the solution of the game."""
+
+    def __init__(self):
+        """Solves the game (if it has not been solved yet)."""
+        solve()
+
+    def movement(self, board, greedy=0):
+        """Performs a movement.
+
+        Params:
+        ----------
+        board : list of int
+            The current board
+        greedy : int
+            The probability of performing a random movement
+
+        Returns
+        -------
+        int
+            The position on the board where performs a movement (0 to 8)
+        """
+        if greedy and random.uniform(0,1) < greedy:
+            return self.random_movement(board)
+        return best_action(board)
+
+    def random_movement(self, board):
+        """Performs a random movement.
+
+        Params:
+        ----------
+        board : list of int
+            The current board
+
+        Returns
+        -------
+        int
+            The position on the board where performs a movement (0 to 8)
+        """
+        return random.choice([index for index, value in enumerate(board) if value == Constants.EMPTY])
@@ -0,0 +1,159 @@
+from operator import mul
+
+import Constants
+from QTable import QTable, decode_state
+
+SIZE = Constants.NUM_ROWS
+NUM_CELLS = Constants.NUM_ROWS*Constants.NUM_COLUMNS
+
+def _compute_transforms():
+    """Computes the 8 symmetries of the square board (rotations and reflections) as permutations.
+
+    Returns
+    -------
+    tuple of tuple of int
+        The permutations. The board transformed by the permutation p is [board[p[i]] for i in positions].
+        The first one is the identity
+    """
+    transforms = []
+    for reflect in (False, True):
+        for rotations in range(4):
+            perm = []
+            for row in range(SIZE):
+                for col in range(SIZE):
+                    r, c = row, col
+                    for _ in range(rotations):
+                        r, c = c, SIZE-1-r
+                    if reflect:
+                        c = SIZE-1-c
+                    perm.append(r*SIZE + c)
+            transforms.append(tuple(perm))
+    return tuple(transforms)
+
+TRANSFORMS = _compute_transforms()
+INVERSES = tuple(tuple(perm.index(pos) for pos in range(NUM_CELLS)) for perm in TRANSFORMS)
+IDENTITY = 0
+# Weights to encode a transformed board without building it: encode(transform(board)) = sum(board[j]*WEIGHTS[t][j])
+WEIGHTS = tuple(tuple(3**inverse[pos] for pos in range(NUM_CELLS)) for inverse in INVERSES)
+
+# Cache of the canonical states. Key: state. Value: (canonical state, transform)
+_CANONICAL = {}
+
+def canonicalize(board):
+    """Gets the canonical representative of a board (the symmetric board with the minimum encoded state).
+
+    Params:
+    ----------
+    board : list of int
+        The board
+
+    Returns
+    -------
+    (int, int)
+        state: the encoded canonical board
+        transform: the index of the transform that maps the board to the canonical board
+    """
+    state = sum(map(mul, board, WEIGHTS[IDENTITY]))
+    canonical = _CANONICAL.get(state)
+    if canonical is None:
+        canonical = (state, IDENTITY)
+        for transform in range(1, len(TRANSFORMS)):
+            transformed = sum(map(mul, board, WEIGHTS[transform]))
+            if transformed < canonical[0]:
+                canonical = (transformed, transform)
+        _CANONICAL[state] = canonical
+    return canonical
+
+def to_canonical_action(action, transform):
+    """Maps an action on the board to the same action on the canonical board.
+
+    Params:
+    ----------
+    action : int
+        The position on the original board
+    transform : int
+        The transform returned by canonicalize
+
+    Returns
+    -------
+    int
+        The position on the canonical board
+    """
+    return INVERSES[transform][action]
+
+def from_canonical_action(action, transform):
+    """Maps an action on the canonical board to the same action on the original board.
+
+    Params:
+    ----------
+    action : int
+        The position on the canonical board
+    transform : int
+        The transform returned by canonicalize
+
+    Returns
+    -------
+    int
+        The position on the original board
+    """
+    return TRANSFORMS[transform][action]
+
+def reduce_table(table):
+    """Builds a table with only the canonical states. If the canonical state of a group
+    has not been visited, the values of a visited symmetric state are used.
+
+    Params:
+    ----------
+    table : QTable
+        A table with any states
+
+    Returns
+    -------
+    QTable
+        The table with canonical states
+    """
+    reduced = QTable(table.num_actions)
+    n = table.num_actions
+    variants = []
+    for state in range(table.num_states):
+        if table.visited[state]:
+            board = decode_state(state, n)
+            canonical, transform = canonicalize(board)
+            if canonical == state:
+                for action in range(n):
+                    reduced.set(state, action, table.values[state*n + action])
+            else:
+                variants.append((state, canonical, transform))
+    for state, canonical, transform in variants:
+        if not canonical in reduced:
+            for action in range(n):
+                reduced.set(canonical, INVERSES[transform][action], table.values[state*n + action])
+    return reduced
+
+def expand_table(table):
+    """Builds a table with all the symmetric states of a table with canonical states.
+
+    Params:
+    ----------
+    table : QTable
+        A table with canonical states
+
+    Returns
+    -------
+    QTable
+        The table with every state
+    """
+    expanded = QTable(table.num_actions)
+    n = table.num_actions
+    for state in range(table.num_states):
+        if table.visited[state]:
+            canonical = decode_state(state, n)
+            for perm in TRANSFORMS:
+                board = [0]*n
+                for pos in range(n):
+                    board[perm[pos]] = canonical[pos]
+                variant = sum(map(mul, board, WEIGHTS[IDENTITY]))
+                if not variant in expanded:
+                    for pos in range(n):
+                        expanded.set(variant, perm[pos], table.values[state*n + pos])
+    return expanded
@@ -0,0 +1,124 @@
+import os
+import threading
+
+import Constants
+from AgentQLearning import AgentQLearning
+from QTable import QTable, QTableFormatError, read_table
+from Symmetry import reduce_table
+
+class TableRegistry:
+    """
+    A registry of the q tables loaded by the process. Each file is loaded once and shared by
+    every agent that uses it. A file is loaded again only if its modification time or size change.
+
+    The shared tables are read-only when they have the binary format, so the agents given by
+    the registry are meant to play (to train, create an AgentQLearning with its own table).
+
+    Attributes:
+    ----------
+    _entries : dict
+        - Key: (path, symmetric)
+        - Value: (stamp of the file, QTable)
+    """
+
+    def __init__(self):
+        """Initializes an empty registry."""
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get_table(self, file=None, symmetric=False):
+        """Gets the table of a file. It is loaded only the first time or when the file changes.
+
+        Params:
+        ----------
+        file : str or None
+            The file with the table. If it is None, Constants.QTABLE_FILE is used
+        symmetric : boolean
+            If it is True, the table only has the canonical states (see Symmetry)
+
+        Returns
+        -------
+        QTable
+            The shared table
+        """
+        key = (os.path.abspath(file or Constants.QTABLE_FILE), symmetric)
+        stamp = _file_stamp(key[0])
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != stamp:
+                table = _load_table(key[0])
+                if symmetric:
+                    table = reduce_table(table)
+                entry = self._entries[key] = (stamp, table)
+            return entry[1]
+
+    def get_agent(self, file=None, symmetric=False):
+        """Gets an agent that plays with the shared table of a file.
+
+        Params:
+        ----------
+        file : str or None
+            The file with the table. If it is None, Constants.QTABLE_FILE is used
+        symmetric : boolean
+            Indicates if the symmetric boards share their q values (see AgentQLearning)
+
+        Returns
+        -------
+        AgentQLearning
+            The agent. It does not copy the table
+        """
+        return AgentQLearning(symmetric=symmetric, Q_table=self.get_table(file, symmetric))
+
+    def clear(self):
+        """Removes all the tables (they are loaded again when they are used)."""
+        with self._lock:
+            self._entries.clear()
+
+def _file_stamp(path):
+    """Gets the stamp used to detect changes of a file.
+
+    Params:
+    ----------
+    path : str
+        The file
+
+    Returns
+    -------
+    (int, int) or None
+        The modification time (ns) and the size of the file, or None if it does not exist
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def _load_table(path):
+    """Loads a table (read-only if it has the binary format).
+
+    Params:
+    ----------
+    path : str
+        The file with the table
+
+    Returns
+    -------
+    QTable
+        The table (empty if the file cannot be read)
+    """
+    try:
+        return read_table(path, writable=False)
+    except FileNotFoundError:
+        print('Error: File could not be read ', path)
+    except EOFError:
+        print('EOFError reading file')
+    except QTableFormatError as error:
+        print('Error:', error)
+    return QTable()
+
+# The registry of the process
+registry = TableRegistry()
+
+def get_agent(file=None, symmetric=False):
+    """Gets an agent that plays with the shared table of a file (see TableRegistry.get_agent)."""
+    return registry.get_agent(file, symmetric)
@@ -1,7 +1,30 @@
 import Constants
-from Player import Player
 
-import pygame
+def _compute_cell_rects():
+    """Computes the rectangles of the positions of the board on the screen (including the part margins).
+
+    Returns
+    -------
+    tuple of (int, int, int, int)
+        The rectangles (x, y, width, height)
+    """
+    rects = []
+    for i in range(Constants.NUM_ROWS*Constants.NUM_COLUMNS):
+        num_column = int(i%Constants.NUM_COLUMNS)
+        x = Constants.MARGIN + num_column*(Constants.PART_SIZE + Constants.STICK_WIDTH + 2*Constants.PART_MARGIN)
+
+        num_row =  int(i/Constants.NUM_COLUMNS)
+        y = Constants.PLUS + Constants.MARGIN + num_row*(Constants.PART_SIZE + Constants.STICK_WIDTH + 2*Constants.PART_MARGIN)
+
+        rects.append((x, y, Constants.PART_SIZE + 2*Constants.PART_MARGIN, Constants.PART_SIZE + 2*Constants.PART_MARGIN))
+    return tuple(rects)
+
+CELL_RECTS = _compute_cell_rects()
+# The area above the board where the turn is shown
+TURN_RECT = (0, 0, Constants.SCREEN_WIDTH, Constants.PLUS + Constants.MARGIN)
+
+# Surfaces drawn once and reused by every render (see TicTacToe._get_layer)
+_layers = {}
 
 class TicTacToe:
     """
@@ -27,6 +50,11 @@ class TicTacToe:
         self.playern1_turn = True
         self.movements = Constants.NUM_COLUMNS*Constants.NUM_ROWS
 
+        # What has been drawn on the screen (see render)
+        self._rendered_screen = None
+        self._rendered_board = None
+        self._rendered_turn = None
+
     def _init_empty_board(self):
         """Initializes the board of the game."""
         self.board = []
@@ -66,14 +94,14 @@ class TicTacToe:
         """
         # Horizontal condition
         for row in range(Constants.NUM_ROWS):
-            elem = Constants.NUM_ROWS*row
+            elem = Constants.NUM_COLUMNS*row
             if self.board[elem] != Constants.EMPTY and self.board[elem] == self.board[elem+1] and self.board[elem] == self.board[elem+2]:
                 return True
 
         # Vertical condition
         for col in range(Constants.NUM_COLUMNS):
             elem = Constants.NUM_COLUMNS
-            if self.board[col+elem] != Constants.EMPTY and self.board[col] == self.board[col+elem] and self.board[col] == self.board[col+2*elem]:
+            if self.board[col] != Constants.EMPTY and self.board[col] == self.board[col+elem] and self.board[col] == self.board[col+2*elem]:
                 return True
 
         # Diagonal condition
@@ -96,6 +124,60 @@ class TicTacToe:
         """
         self.board[pos] = symbol
 
+    def _is_free(self, pos):
+        """Check if a position has no part.
+
+        Params:
+        ----------
+        pos : int
+            The position
+
+        Returns
+        -------
+        boolean
+            True if the position is empty
+        """
+        return self.board[pos] == Constants.EMPTY
+
+    def _wins_after(self, pos, symbol):
+        """Check if a player has won after adding its part to a position. The engines override it
+        to check only the lines through the position.
+
+        Params:
+        ----------
+        pos : int
+            The position of the last movement
+        symbol : int
+            The player that has moved (1 or 2)
+
+        Returns
+        -------
+        boolean
+            True if the player has won
+        """
+        return self._check_win()
+
+    def _step_info(self, winner, cheat):
+        """Builds the info of a movement (see step).
+
+        Params:
+        ----------
+        winner : int or None
+            The player that has won
+        cheat : boolean
+            Indicates if the player has cheated
+
+        Returns
+        -------
+        dict
+            The info
+        """
+        return {
+            'turn': self.playern1_turn,
+            'winner': winner,
+            'cheat': cheat
+        }
+
     def step(self, action):
         """Performs a movement.
         
@@ -126,11 +208,11 @@ class TicTacToe:
             player = Constants.PLAYER2
             other_player = Constants.PLAYER1
 
-        if self.board[action] == Constants.EMPTY:   # If it is a valid movement
+        if self._is_free(action):   # If it is a valid movement
             self._add_movement_to_board(action, player) # Add movement
             cheat = False   # No cheat
 
-            if self._check_win(): # If player has won
+            if self._wins_after(action, player): # If player has won
                 done = True
                 winner = player
                 reward = Constants.REWARD_WIN
@@ -152,19 +234,13 @@ class TicTacToe:
             winner = other_player
             self.movements = 0
 
-        info = {
-            'turn': self.playern1_turn,
-            'winner': winner,
-            'cheat': cheat
-        }
-
-        return self.get_board(), done, reward, info
+        return self.get_board(), done, reward, self._step_info(winner, cheat)
 
     def print_board(self):
         """Print the board on the screen."""
         for row in range(Constants.NUM_ROWS):
             for col in range(Constants.NUM_COLUMNS):
-                elem = row*Constants.NUM_ROWS + col
+                elem = row*Constants.NUM_COLUMNS + col
                 if self.board[elem] == Constants.PLAYER1:
                     value = 'X'
                 elif self.board[elem] == Constants.PLAYER2:
@@ -175,63 +251,113 @@ class TicTacToe:
             print()
 
     def render(self, screen):
-        """Render the game (update the GUI of the game).
+        """Render the game (update the GUI of the game). The first time it draws the whole game,
+        then it only draws the positions and the turn that have changed since the last render.
         
         Params:
         ----------
         screen :
             The screen where draws the game
         """
-        # Draws the background and the game
-        screen.blit(Constants.BACKGROUND, (0, 0))
-
-        # Draws the parts
-        for i, value in enumerate(self.board):
-            num_column = int(i%Constants.NUM_COLUMNS)
-            x = Constants.MARGIN + Constants.PART_MARGIN + num_column*(Constants.PART_SIZE + Constants.STICK_WIDTH + 2*Constants.PART_MARGIN)
-
-            num_row =  int(i/Constants.NUM_ROWS)
-            y = Constants.PLUS + Constants.MARGIN + Constants.PART_MARGIN + num_row*(Constants.PART_SIZE + Constants.STICK_WIDTH + 2*Constants.PART_MARGIN)
-
-            if value == Constants.PLAYER1:
-                self.draw_x(x, y, Constants.PART_SIZE, Constants.PART_SIZE, Constants.COLOR_X, screen)
-            elif value == Constants.PLAYER2:
-                pygame.draw.ellipse(screen, Constants.COLOR_O, (x,y,Constants.PART_SIZE, Constants.PART_SIZE), 10)
-
-        # Draws the sticks
-        for stick in range(1,Constants.NUM_COLUMNS):
-            x = Constants.MARGIN + stick*(Constants.PART_SIZE + 2*Constants.PART_MARGIN + Constants.STICK_WIDTH) - Constants.STICK_WIDTH
-            y = Constants.PLUS + Constants.MARGIN
-            largo = Constants.SCREEN_HEIGHT - 2*Constants.MARGIN - Constants.PLUS
+        # pygame is only imported to render, so the game can be used without it (headless training)
+        import pygame
+
+        board_layer = self._get_layer('board')
+        if self._rendered_screen is not screen:
+            # Draws the background, the sticks and the parts
+            screen.blit(board_layer, (0, 0))
+            self._rendered_screen = screen
+            self._rendered_board = [Constants.EMPTY]*len(CELL_RECTS)
+            self._rendered_turn = None
+            dirty_rects = None
+        else:
+            dirty_rects = []
+
+        # Draws the parts that have changed
+        board = self.board
+        for i, value in enumerate(board):
+            if value != self._rendered_board[i]:
+                rect = CELL_RECTS[i]
+                screen.blit(board_layer, rect, rect)
+                if value != Constants.EMPTY:
+                    screen.blit(self._get_layer(value), (rect[0] + Constants.PART_MARGIN, rect[1] + Constants.PART_MARGIN))
+                if dirty_rects is not None:
+                    dirty_rects.append(rect)
+        self._rendered_board = list(board)   # a snapshot, self.board is updated in place
 
-            pygame.draw.rect(screen, Constants.COLOR_STICK, (x, y, Constants.STICK_WIDTH, largo), 0)
+        # Show the turn
+        turn = self.playern1_turn if self.movements > 0 else None
+        if turn != self._rendered_turn or dirty_rects is None:
+            screen.blit(board_layer, TURN_RECT, TURN_RECT)
+            if turn is not None:
+                screen.blit(self._get_layer('turn X' if turn else 'turn O'), (Constants.SCREEN_WIDTH/2 - 105, Constants.PLUS - 25))
+                (turn_text, turn_text_rect) = self._get_layer('turn text')
+                screen.blit(turn_text, turn_text_rect)
+            if dirty_rects is not None:
+                dirty_rects.append(TURN_RECT)
+            self._rendered_turn = turn
 
-        # Draws the sticks
-        for stick in range(1,Constants.NUM_ROWS):
-            y = Constants.PLUS + Constants.MARGIN + stick*(Constants.PART_SIZE + 2*Constants.PART_MARGIN + Constants.STICK_WIDTH) - Constants.STICK_WIDTH
-            x = Constants.MARGIN
-            largo = Constants.SCREEN_WIDTH - 2*Constants.MARGIN
+        # Update the screen
+        if dirty_rects is None:
+            pygame.display.flip()
+        elif dirty_rects:
+            pygame.display.update(dirty_rects)
 
-            pygame.draw.rect(screen, Constants.COLOR_STICK, (x, y, largo, Constants.STICK_WIDTH), 0)
+    def _get_layer(self, name):
+        """Gets a surface that is drawn only once and reused by every render.
 
-        # Show the turn
-        if self.movements > 0:
-            x = Constants.SCREEN_WIDTH/2 - 105
-            y = Constants.PLUS - 25
-            if self.playern1_turn:
-                self.draw_x(x, y, 40, 40, Constants.COLOR_X, screen)
-            else:
-                pygame.draw.ellipse(screen, Constants.COLOR_O, (x,y,40, 40), 8)
-            
-            x = x + 140
-            y = Constants.PLUS
-            text = Constants.TURN
-            (score_text, title_text_rect) = self._define_text(font=Constants.FONT_GAMES, font_size=28, text_string=text, color=Constants.COLOR_TEXT, 
-                pos_x=x, pos_y=y)
-            screen.blit(score_text, title_text_rect)
+        Params:
+        ----------
+        name : str or int
+            - 'board': the background with the sticks
+            - 1 or 2: the part of the player
+            - 'turn X' or 'turn O': the part shown with the turn
+            - 'turn text': the turn text and its position
 
-        # Update the screen
-        pygame.display.flip()
+        Returns
+        -------
+        Surface (pygame)
+            The surface (for 'turn text', a tuple (text, text_rect))
+        """
+        import pygame
+        import Assets
+
+        layer = _layers.get(name)
+        if layer is not None:
+            return layer
+
+        if name == 'board':
+            layer = Assets.get_background().copy()
+
+            # Draws the sticks
+            for stick in range(1,Constants.NUM_COLUMNS):
+                x = Constants.MARGIN + stick*(Constants.PART_SIZE + 2*Constants.PART_MARGIN + Constants.STICK_WIDTH) - Constants.STICK_WIDTH
+                y = Constants.PLUS + Constants.MARGIN
+                largo = Constants.SCREEN_HEIGHT - 2*Constants.MARGIN - Constants.PLUS
+
+                pygame.draw.rect(layer, Constants.COLOR_STICK, (x, y, Constants.STICK_WIDTH, largo), 0)
+
+            # Draws the sticks
+            for stick in range(1,Constants.NUM_ROWS):
+                y = Constants.PLUS + Constants.MARGIN + stick*(Constants.PART_SIZE + 2*Constants.PART_MARGIN + Constants.STICK_WIDTH) - Constants.STICK_WIDTH
+                x = Constants.MARGIN
+                largo = Constants.SCREEN_WIDTH - 2*Constants.MARGIN
+
+                pygame.draw.rect(layer, Constants.COLOR_STICK, (x, y, largo, Constants.STICK_WIDTH), 0)
+        elif name == Constants.PLAYER1 or name == 'turn X':
+            size = Constants.PART_SIZE if name == Constants.PLAYER1 else 40
+            layer = pygame.Surface((size + 13, size + 1), pygame.SRCALPHA)
+            self.draw_x(0, 0, size, size, Constants.COLOR_X, layer)
+        elif name == Constants.PLAYER2 or name == 'turn O':
+            size, width = (Constants.PART_SIZE, 10) if name == Constants.PLAYER2 else (40, 8)
+            layer = pygame.Surface((size, size), pygame.SRCALPHA)
+            pygame.draw.ellipse(layer, Constants.COLOR_O, (0, 0, size, size), width)
+        elif name == 'turn text':
+            layer = self._define_text(font=Constants.FONT_GAMES, font_size=28, text_string=Constants.TURN, color=Constants.COLOR_TEXT,
+                pos_x=Constants.SCREEN_WIDTH/2 + 35, pos_y=Constants.PLUS)
+
+        _layers[name] = layer
+        return layer
 
     def draw_x(self,x,y,width,height,color,screen):
         """Draws the part X.
@@ -251,6 +377,7 @@ class TicTacToe:
         screen :
             The screen where draws the part X
         """
+        import pygame
 
         for i in range(12):
             pygame.draw.aaline(screen,color,(x+i,y),(width+x+i,height+y))  # start_pos(x+thickness,y)---end_pos(width+x+thickness,height+y)
@@ -280,6 +407,7 @@ class TicTacToe:
             text: texto to be drawn
             text_rect: position of the text
         """
-        text = pygame.font.Font(font, font_size).render(text_string, True, color)
+        import Assets
+        text = Assets.get_font(font, font_size).render(text_string, True, color)
         text_rect = text.get_rect(center=(pos_x, pos_y))
         return (text, text_rect)
\ No newline at end of file
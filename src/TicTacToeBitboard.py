@@ -0,0 +1,143 @@
+import Constants
+from TicTacToe import TicTacToe
+from TicTacToeNxN import get_line_table
+
+NUM_CELLS = Constants.NUM_ROWS*Constants.NUM_COLUMNS
+
+_LINES = get_line_table(Constants.NUM_ROWS, Constants.NUM_COLUMNS, Constants.WIN_LENGTH)
+# The bit masks of every winning line (rows, columns and diagonals)
+WIN_MASKS = _LINES.line_masks
+# For each position, the winning lines that pass through it
+CELL_WIN_MASKS = _LINES.cell_masks
+
+# Cache of the list boards already built. Key: (bitboard player1 << NUM_CELLS) | bitboard player2
+_BOARD_CACHE = {}
+
+def _bitboards_to_board(x_bits, o_bits):
+    """Converts the bitboards to a board.
+
+    Params:
+    ----------
+    x_bits : int
+        The bitboard of the player1
+    o_bits : int
+        The bitboard of the player2
+
+    Returns
+    -------
+    tuple of int
+        The board (0 empty, 1 player1, 2 player2 in each position)
+    """
+    board = []
+    for pos in range(NUM_CELLS):
+        if x_bits >> pos & 1:
+            board.append(Constants.PLAYER1)
+        elif o_bits >> pos & 1:
+            board.append(Constants.PLAYER2)
+        else:
+            board.append(Constants.EMPTY)
+    return tuple(board)
+
+class TicTacToeBitboard(TicTacToe):
+    """
+    A Tic Tac Toe game stored as two bitboards. It has the same interface as TicTacToe
+    (step, get_board, get_turn, render...) so it can be used as a drop-in replacement.
+
+    Attributes:
+    ----------
+    bitboards : list of int
+        The parts of each player. bitboards[0] for player1 and bitboards[1] for player2.
+        Bit i is set if the player has a part in the position i
+    player1_turn : boolean
+        Indicates if it is the player1 turn or not
+    movements : int
+        Number of moves remaining in the game
+    """
+
+    def _init_empty_board(self):
+        """Initializes the board of the game."""
+        self.bitboards = [0, 0]
+
+    @property
+    def board(self):
+        """The board of the game as a list of int (same format as TicTacToe.board)."""
+        key = self.bitboards[0] << NUM_CELLS | self.bitboards[1]
+        board = _BOARD_CACHE.get(key)
+        if board is None:
+            board = _BOARD_CACHE[key] = _bitboards_to_board(*self.bitboards)
+        return list(board)
+
+    def get_board(self):
+        """Get the board.
+
+        Returns
+        -------
+        list of int
+            The board of the game. It is a list with 9 elements. Values:
+            - 0: there is no part in this position
+            - 1: there is a player1 part in this position
+            - 2: there is a player2 part in this position
+        """
+        return self.board
+
+    def _check_win(self):
+        """Check is some player has won
+
+        Returns
+        -------
+        boolean
+            True if some player has won
+        """
+        for bits in self.bitboards:
+            for mask in WIN_MASKS:
+                if bits & mask == mask:
+                    return True
+        return False
+
+    def _wins_after(self, pos, symbol):
+        """Check if a player has won after adding its part to a position. Only the lines through the position are checked.
+
+        Params:
+        ----------
+        pos : int
+            The position of the last movement
+        symbol : int
+            The player that has moved (1 or 2)
+
+        Returns
+        -------
+        boolean
+            True if the player has won
+        """
+        bits = self.bitboards[symbol-1]
+        for mask in CELL_WIN_MASKS[pos]:
+            if bits & mask == mask:
+                return True
+        return False
+
+    def _is_free(self, pos):
+        """Check if a position has no part.
+
+        Params:
+        ----------
+        pos : int
+            The position
+
+        Returns
+        -------
+        boolean
+            True if the position is empty
+        """
+        return not (self.bitboards[0] | self.bitboards[1]) >> pos & 1
+
+    def _add_movement_to_board(self, pos, symbol):
+        """Add some movement to board.
+
+        Params:
+        ----------
+        pos : int
+            The position where adds the part to the board
+        symbol : int
+            The player that moves (1 or 2)
+        """
+        self.bitboards[symbol-1] |= 1 << pos
@@ -0,0 +1,226 @@
+import Constants
+from TicTacToe import TicTacToe
+from TicTacToeBitboard import CELL_WIN_MASKS, NUM_CELLS, WIN_MASKS
+
+class StepInfo:
+    """
+    The info of a movement (see TicTacToeCompact.step). It can be read as the info dict of TicTacToe.step:
+    info['winner'] is the same as info.winner.
+
+    Attributes:
+    ----------
+    turn : boolean
+        Indicates the next turn
+    winner : int or None
+        The player that has won
+    cheat : boolean
+        Indicates if the player has cheated
+    """
+
+    __slots__ = ('turn', 'winner', 'cheat')
+
+    def __init__(self, turn=True, winner=None, cheat=False):
+        self.turn = turn
+        self.winner = winner
+        self.cheat = cheat
+
+    def __getitem__(self, key):
+        """Gets a field as the info dict of TicTacToe.step.
+
+        Params:
+        ----------
+        key : str
+            'turn', 'winner' or 'cheat'
+
+        Returns
+        -------
+            The value of the field
+
+        Raises
+        ------
+        KeyError
+            If the key is not a field
+        """
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        """Gets a field as dict.get.
+
+        Params:
+        ----------
+        key : str
+            'turn', 'winner' or 'cheat'
+        default :
+            The value returned if the key is not a field
+
+        Returns
+        -------
+            The value of the field or default
+        """
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def keys(self):
+        """Gets the names of the fields.
+
+        Returns
+        -------
+        tuple of str
+            The names of the fields
+        """
+        return self.__slots__
+
+    # A StepInfo is mutable (with copy=False it is updated by every movement), so it is not hashable, like a dict
+    __hash__ = None
+
+    def __eq__(self, other):
+        """Compares with another StepInfo or with an info dict of TicTacToe.step."""
+        if isinstance(other, StepInfo):
+            return self.turn == other.turn and self.winner == other.winner and self.cheat == other.cheat
+        if isinstance(other, dict):
+            return other == {key: getattr(self, key) for key in self.__slots__}
+        return NotImplemented
+
+    def __repr__(self):
+        return 'StepInfo(turn={}, winner={}, cheat={})'.format(self.turn, self.winner, self.cheat)
+
+class TicTacToeCompact(TicTacToe):
+    """
+    A Tic Tac Toe game that allocates as little as possible. It has the same rules and the same step,
+    get_board and get_turn as TicTacToe (step is shared, only the hooks of the board are overridden):
+        - the fields are __slots__, so the __dict__ of the instances is never created
+        - the board is a preallocated list updated in place and the wins are checked with bitboards
+          (see TicTacToeBitboard)
+        - the info of step is a StepInfo instead of a dict
+        - with copy=False, get_board and step return the board of the game and step returns the same
+          StepInfo every time (both are updated by the next movement), so a movement does not allocate
+          any list or info. Use it only if the board and the info are read before the next movement
+        - reset starts a new game without creating another instance
+
+    Attributes:
+    ----------
+    board : list of int
+        The board of the game (same format as TicTacToe.board)
+    bitboards : list of int
+        The parts of each player (see TicTacToeBitboard)
+    playern1_turn : boolean
+        Indicates if it is the player1 turn or not
+    movements : int
+        Number of moves remaining in the game
+    copy : boolean
+        Indicates if get_board and step return copies of the board and new infos
+    """
+
+    __slots__ = ('board', 'playern1_turn', 'movements', '_rendered_screen', '_rendered_board', '_rendered_turn',
+                 'bitboards', 'copy', '_info')
+
+    def __init__(self, copy=True):
+        """Initializes a game.
+
+        Params:
+        ----------
+        copy : boolean
+            If it is False, get_board and step return the board of the game and step returns the same info
+        """
+        self.copy = copy
+        self._info = StepInfo()
+        super().__init__()
+
+    def _init_empty_board(self):
+        """Initializes the board of the game."""
+        self.board = [Constants.EMPTY]*NUM_CELLS
+        self.bitboards = [0, 0]
+
+    def reset(self):
+        """Starts a new game (the board is cleared in place)."""
+        board = self.board
+        for pos in range(NUM_CELLS):
+            board[pos] = Constants.EMPTY
+        self.bitboards[0] = self.bitboards[1] = 0
+        self.playern1_turn = True
+        self.movements = NUM_CELLS
+
+    def get_board(self):
+        """Get the board.
+
+        Returns
+        -------
+        list of int
+            The board of the game (a copy if copy is True). It is a list with 9 elements. Values:
+            - 0: there is no part in this position
+            - 1: there is a player1 part in this position
+            - 2: there is a player2 part in this position
+        """
+        return self.board.copy() if self.copy else self.board
+
+    def _check_win(self):
+        """Check is some player has won
+
+        Returns
+        -------
+        boolean
+            True if some player has won
+        """
+        for bits in self.bitboards:
+            for mask in WIN_MASKS:
+                if bits & mask == mask:
+                    return True
+        return False
+
+    def _add_movement_to_board(self, pos, symbol):
+        """Add some movement to board.
+
+        Params:
+        ----------
+        pos : int
+            The position where adds the part to the board
+        symbol : int
+            The player that moves (1 or 2)
+        """
+        self.board[pos] = symbol
+        self.bitboards[symbol-1] |= 1 << pos
+
+    def _wins_after(self, pos, symbol):
+        """Check if a player has won after adding its part to a position. Only the lines through the position are checked.
+
+        Params:
+        ----------
+        pos : int
+            The position of the last movement
+        symbol : int
+            The player that has moved (1 or 2)
+
+        Returns
+        -------
+        boolean
+            True if the player has won
+        """
+        bits = self.bitboards[symbol-1]
+        for mask in CELL_WIN_MASKS[pos]:
+            if bits & mask == mask:
+                return True
+        return False
+
+    def _step_info(self, winner, cheat):
+        """Builds the info of a movement (see step). With copy=False the same StepInfo is updated and returned.
+
+        Params:
+        ----------
+        winner : int or None
+            The player that has won
+        cheat : boolean
+            Indicates if the player has cheated
+
+        Returns
+        -------
+        StepInfo
+            The info
+        """
+        if self.copy:
+            return StepInfo(self.playern1_turn, winner, cheat)
+        info = self._info
+        info.turn = self.playern1_turn
+        info.winner = winner
+        info.cheat = cheat
+        return info
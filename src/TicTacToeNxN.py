@@ -0,0 +1,196 @@
+import Constants
+from TicTacToe import TicTacToe
+
+# Directions of the lines (row step, column step): horizontal, vertical, diagonal and anti-diagonal
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+class LineTable:
+    """
+    The winning lines of a board: every group of win_length consecutive positions in a row, a column or a diagonal.
+    The tables are computed once for each board size (see get_line_table).
+
+    Attributes:
+    ----------
+    rows : int
+        Number of rows of the board
+    columns : int
+        Number of columns of the board
+    win_length : int
+        Number of parts in a row needed to win
+    lines : tuple of tuple of int
+        The positions of each line
+    line_masks : tuple of int
+        The bit mask of each line. Bit i is set if the position i belongs to the line
+    cell_lines : tuple of tuple of int
+        For each position, the indexes of the lines that pass through it
+    cell_masks : tuple of tuple of int
+        For each position, the bit masks of the lines that pass through it
+    """
+
+    def __init__(self, rows, columns, win_length):
+        """Computes the lines of the board.
+
+        Params:
+        ----------
+        rows : int
+            Number of rows of the board
+        columns : int
+            Number of columns of the board
+        win_length : int
+            Number of parts in a row needed to win
+        """
+        if win_length < 1 or win_length > max(rows, columns):
+            raise ValueError('Invalid win length {} for a {}x{} board'.format(win_length, rows, columns))
+        self.rows = rows
+        self.columns = columns
+        self.win_length = win_length
+
+        lines = []
+        for row_step, column_step in DIRECTIONS:
+            for row in range(rows):
+                for column in range(columns):
+                    last_row = row + row_step*(win_length - 1)
+                    last_column = column + column_step*(win_length - 1)
+                    if 0 <= last_row < rows and 0 <= last_column < columns:
+                        lines.append(tuple((row + row_step*i)*columns + column + column_step*i for i in range(win_length)))
+        self.lines = tuple(dict.fromkeys(lines))  # With win_length 1 every direction gives the same lines
+        self.line_masks = tuple(sum(1 << pos for pos in line) for line in self.lines)
+        self.cell_lines = tuple(tuple(index for index, line in enumerate(self.lines) if pos in line) for pos in range(rows*columns))
+        self.cell_masks = tuple(tuple(self.line_masks[index] for index in indexes) for indexes in self.cell_lines)
+
+# Line tables already computed. Key: (rows, columns, win_length)
+_line_tables = {}
+
+def get_line_table(rows=Constants.NUM_ROWS, columns=Constants.NUM_COLUMNS, win_length=Constants.WIN_LENGTH):
+    """Gets the line table of a board (it is computed only the first time).
+
+    Params:
+    ----------
+    rows : int
+        Number of rows of the board
+    columns : int
+        Number of columns of the board
+    win_length : int
+        Number of parts in a row needed to win
+
+    Returns
+    -------
+    LineTable
+        The line table
+    """
+    key = (rows, columns, win_length)
+    table = _line_tables.get(key)
+    if table is None:
+        table = _line_tables[key] = LineTable(rows, columns, win_length)
+    return table
+
+class TicTacToeNxN(TicTacToe):
+    """
+    A game of k in a row on a board of any size (for example 4x4 with 4 in a row or 5x5 with 4 in a row).
+    It has the same interface as TicTacToe (step, get_board, get_turn...). The rewards are the same too.
+
+    After each movement, only the lines through the position of the movement are checked (see LineTable).
+    The game can only be rendered if its size is the size of Constants (NUM_ROWS x NUM_COLUMNS).
+
+    Attributes:
+    ----------
+    board : list of int
+        The board of the game. It is a list with rows*columns elements (row by row). Values:
+        - 0: there is no part in this position
+        - 1: there is a player1 part in this position
+        - 2: there is a player2 part in this position
+    bitboards : list of int
+        The parts of each player. bitboards[0] for player1 and bitboards[1] for player2.
+        Bit i is set if the player has a part in the position i
+    lines : LineTable
+        The winning lines of the board
+    player1_turn : boolean
+        Indicates if it is the player1 turn or not
+    movements : int
+        Number of moves remaining in the game
+    """
+
+    def __init__(self, rows=Constants.NUM_ROWS, columns=Constants.NUM_COLUMNS, win_length=Constants.WIN_LENGTH):
+        """Initializes a game.
+
+        Params:
+        ----------
+        rows : int
+            Number of rows of the board
+        columns : int
+            Number of columns of the board
+        win_length : int
+            Number of parts in a row needed to win
+        """
+        self.rows = rows
+        self.columns = columns
+        self.lines = get_line_table(rows, columns, win_length)
+        super().__init__()
+        self.movements = rows*columns
+
+    def _init_empty_board(self):
+        """Initializes the board of the game."""
+        self.board = [Constants.EMPTY]*(self.rows*self.columns)
+        self.bitboards = [0, 0]
+
+    def _check_win(self):
+        """Check is some player has won
+
+        Returns
+        -------
+        boolean
+            True if some player has won
+        """
+        for bits in self.bitboards:
+            for mask in self.lines.line_masks:
+                if bits & mask == mask:
+                    return True
+        return False
+
+    def _wins_after(self, pos, symbol):
+        """Check if a player has won after adding its part to a position. Only the lines through the position are checked.
+
+        Params:
+        ----------
+        pos : int
+            The position of the last movement
+        symbol : int
+            The player that has moved (1 or 2)
+
+        Returns
+        -------
+        boolean
+            True if the player has won
+        """
+        bits = self.bitboards[symbol-1]
+        for mask in self.lines.cell_masks[pos]:
+            if bits & mask == mask:
+                return True
+        return False
+
+    def _add_movement_to_board(self, pos, symbol):
+        """Add some movement to board.
+
+        Params:
+        ----------
+        pos : int
+            The position where adds the part to the board
+        symbol : int
+            The player that moves (1 or 2)
+        """
+        self.board[pos] = symbol
+        self.bitboards[symbol-1] |= 1 << pos
+
+    def print_board(self):
+        """Print the board on the screen."""
+        for row in range(self.rows):
+            for col in range(self.columns):
+                elem = row*self.columns + col
+                if self.board[elem] == Constants.PLAYER1:
+                    value = 'X'
+                elif self.board[elem] == Constants.PLAYER2:
+                    value = 'O'
+                else:
+                    value = ' '
+                print(value, end='|')
+            print()
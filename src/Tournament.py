@@ -0,0 +1,307 @@
+import itertools
+import json
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import Solver
+import TableRegistry
+from AgentQLearning import AgentQLearning
+from QTable import QTable, read_table
+from TicTacToeBitboard import TicTacToeBitboard
+
+LATENCY_SAMPLES = 10000 # Maximum number of movement latencies kept per policy and worker
+
+class RandomPolicy:
+    """A player that always performs a random movement (see AgentQLearning.random_movement)."""
+
+    def __init__(self):
+        """Initializes the player (its q table is empty and it is never used)."""
+        self.agent = AgentQLearning(Q_table=QTable())
+
+    def movement(self, board, greedy=0):
+        """Performs a random movement.
+
+        Params:
+        ----------
+        board : list of int
+            The current board
+        greedy : float
+            Ignored (the movement is always random)
+
+        Returns
+        -------
+        int
+            The position on the board
+        """
+        return self.agent.random_movement(board)
+
+def _qtable_policy(file):
+    """Creates an agent that plays with the q table of a file (mapped read only, see QTable.read_table).
+
+    Params:
+    ----------
+    file : str
+        The file of the q table
+
+    Returns
+    -------
+    AgentQLearning
+        The agent
+    """
+    return AgentQLearning(Q_table=read_table(file, writable=False))
+
+def _qtable_symmetric_policy(file):
+    """Creates an agent with symmetries that plays with the q table of a file. The table is reduced to the
+    canonical states (see Symmetry.reduce_table), as the cli and the server do (see TableRegistry).
+
+    Params:
+    ----------
+    file : str
+        The file of the q table
+
+    Returns
+    -------
+    AgentQLearning
+        The agent
+    """
+    return TableRegistry.get_agent(file, symmetric=True)
+
+def _linear_policy(file):
+    """Creates a linear agent with the weights of a file (see AgentLinear.read_weights).
+
+    Params:
+    ----------
+    file : str
+        The file of the weights
+
+    Returns
+    -------
+    AgentLinear
+        The agent
+    """
+    from AgentLinear import AgentLinear    # NumPy is only needed for the linear agent
+    player = AgentLinear()
+    player.read_weights(file)
+    return player
+
+# Policies that can be used in a tournament. Key: name. Value: function that creates the player from the argument of the spec
+POLICIES = {
+    'random': lambda argument: RandomPolicy(),
+    'solver': lambda argument: Solver.SolverPlayer(),
+    'qtable': _qtable_policy,
+    'qtable-symmetric': _qtable_symmetric_policy,
+    'linear': _linear_policy,
+}
+
+def create_policy(spec):
+    """Creates a player from its spec.
+
+    Params:
+    ----------
+    spec : str
+        'name' or 'name:argument'. Examples: 'random', 'solver', 'qtable:assets/qtable.qtb'
+
+    Returns
+    -------
+        The player (it has a movement(board, greedy) method)
+    """
+    name, _, argument = spec.partition(':')
+    if not name in POLICIES:
+        raise ValueError('Unknown policy: ' + spec)
+    return POLICIES[name](argument)
+
+def _sample(samples, value, seen, rng):
+    """Adds a value to a reservoir sample of at most LATENCY_SAMPLES values."""
+    if len(samples) < LATENCY_SAMPLES:
+        samples.append(value)
+    else:
+        index = rng.randrange(seen)
+        if index < LATENCY_SAMPLES:
+            samples[index] = value
+
+def _play_games(spec1, spec2, first_game, games, seed):
+    """Plays games between two policies (it runs on a worker process). The policy 1 plays with X
+    in the even games and with O in the odd games.
+
+    Params:
+    ----------
+    spec1, spec2 : str
+        The specs of the policies (see create_policy)
+    first_game : int
+        The number of the first game (to alternate the sides)
+    games : int
+        Number of games
+    seed : int
+        The seed of the random generator
+
+    Returns
+    -------
+    dict
+        The results of the policy 1 and the latencies of the movements of each policy
+    """
+    # The policies use the global random generator: its state is restored at the end, because without
+    # an executor the games are played on the process of the caller
+    random_state = random.getstate()
+    random.seed(seed)
+    try:
+        return _play_seeded_games(spec1, spec2, first_game, games, random.Random(seed))
+    finally:
+        random.setstate(random_state)
+
+def _play_seeded_games(spec1, spec2, first_game, games, rng):
+    """Plays games between two policies once the global random generator is seeded (see _play_games).
+
+    Params:
+    ----------
+    spec1, spec2 : str
+        The specs of the policies (see create_policy)
+    first_game : int
+        The number of the first game (to alternate the sides)
+    games : int
+        Number of games
+    rng : random.Random
+        The generator of the reservoir samples of the latencies
+
+    Returns
+    -------
+    dict
+        The results of the policy 1 and the latencies of the movements of each policy
+    """
+    policies = (create_policy(spec1), create_policy(spec2))
+    results = {'wins': 0, 'draws': 0, 'losses': 0, 'wins_x': 0, 'wins_o': 0, 'cheats': 0}
+    latencies = ([], [])
+    moves = [0, 0]
+
+    for game_number in range(first_game, first_game + games):
+        game = TicTacToeBitboard()
+        board = game.get_board()
+        policy1_x = game_number % 2 == 0
+        done = False
+        while not done:
+            index = 0 if game.get_turn() == policy1_x else 1
+            start = time.perf_counter_ns()
+            action = policies[index].movement(board, 0)
+            latency = time.perf_counter_ns() - start
+            moves[index] += 1
+            _sample(latencies[index], latency, moves[index], rng)
+            board, done, reward, info = game.step(action)
+
+        if info['cheat']:
+            results['cheats'] += 1
+        winner = info['winner']
+        if winner is None:
+            results['draws'] += 1
+        elif (winner == 1) == policy1_x:
+            results['wins'] += 1
+            results['wins_x' if policy1_x else 'wins_o'] += 1
+        else:
+            results['losses'] += 1
+
+    return {'results': results, 'latencies': latencies, 'moves': moves}
+
+def _percentiles(samples):
+    """Gets the percentiles (in microseconds) of the latencies."""
+    if not samples:
+        return {}
+    samples = sorted(samples)
+    def percentile(p):
+        return round(samples[min(len(samples) - 1, int(p/100*len(samples)))]/1000, 3)
+    return {'p50_us': percentile(50), 'p90_us': percentile(90), 'p99_us': percentile(99), 'max_us': round(samples[-1]/1000, 3)}
+
+def run_match(spec1, spec2, games, executor=None, workers=1, seed=0):
+    """Plays a match between two policies.
+
+    Params:
+    ----------
+    spec1, spec2 : str
+        The specs of the policies (see create_policy)
+    games : int
+        Number of games (at least 1)
+    executor : concurrent.futures.Executor or None
+        The pool of workers. If it is None, the games are played on this process
+    workers : int
+        Number of chunks of games
+    seed : int
+        The seed of the match
+
+    Returns
+    -------
+    dict
+        The report of the match (results and rates of the policy 1, games per second and latencies)
+
+    Raises
+    ------
+    ValueError
+        If games is less than 1
+    """
+    if games < 1:
+        raise ValueError('The number of games must be at least 1: {}'.format(games))
+    chunk = -(-games//workers)
+    chunks = [(first, min(chunk, games - first)) for first in range(0, games, chunk)]
+    start = time.perf_counter()
+    if executor is None:
+        outputs = [_play_games(spec1, spec2, first, size, seed*1000003 + index) for index, (first, size) in enumerate(chunks)]
+    else:
+        futures = [executor.submit(_play_games, spec1, spec2, first, size, seed*1000003 + index) for index, (first, size) in enumerate(chunks)]
+        outputs = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start
+
+    results = {}
+    for output in outputs:
+        for name, value in output['results'].items():
+            results[name] = results.get(name, 0) + value
+    report = {
+        'policy1': spec1,
+        'policy2': spec2,
+        'games': games,
+        **results,
+        'win_rate': results['wins']/games,
+        'draw_rate': results['draws']/games,
+        'loss_rate': results['losses']/games,
+        'seconds': round(elapsed, 3),
+        'games_per_second': round(games/elapsed, 1),
+    }
+    for index, spec in enumerate((spec1, spec2)):
+        samples = [latency for output in outputs for latency in output['latencies'][index]]
+        report['latency_policy{}'.format(index + 1)] = {
+            'moves': sum(output['moves'][index] for output in outputs),
+            **_percentiles(samples),
+        }
+    return report
+
+def run_tournament(specs, games, workers=1, seed=0):
+    """Plays a match between every pair of policies (round robin).
+
+    Params:
+    ----------
+    specs : list of str
+        The specs of the policies (see create_policy)
+    games : int
+        Number of games of each match
+    workers : int
+        Number of worker processes (1 to play on this process)
+    seed : int
+        The seed of the tournament
+
+    Returns
+    -------
+    dict
+        The report with the matches (see run_match)
+    """
+    pairs = list(itertools.combinations(specs, 2)) if len(specs) > 1 else [(specs[0], specs[0])]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            matches = [run_match(spec1, spec2, games, executor, workers, seed + index) for index, (spec1, spec2) in enumerate(pairs)]
+    else:
+        matches = [run_match(spec1, spec2, games, None, 1, seed + index) for index, (spec1, spec2) in enumerate(pairs)]
+    return {'games_per_match': games, 'workers': workers, 'seed': seed, 'matches': matches}
+
+def write_report(report, file=None):
+    """Writes the report as JSON (to the standard output if file is None)."""
+    text = json.dumps(report, indent=2)
+    if file is None:
+        print(text)
+    else:
+        with open(file, 'w') as handle:
+            handle.write(text + '\n')
@@ -0,0 +1,127 @@
+import Constants
+from QTable import encode_state
+from TicTacToeCompact import TicTacToeCompact
+from TrainingMonitor import TrainingMonitor
+
+def run_episode(player, game_class=TicTacToeCompact, alpha=Constants.ALPHA, discount_factor=Constants.DISCOUNT_FACTOR,
+        greedy=Constants.GREEDY, replay=None):
+    """Plays a game of the agent against itself and updates its q table.
+
+    Params:
+    ----------
+    player : AgentQLearning
+        The agent to train
+    game_class : class
+        The game engine to use (TicTacToe, TicTacToeBitboard or TicTacToeCompact)
+    alpha : float
+        The learning rate
+    discount_factor : float
+        The discount factor
+    greedy : float
+        The probability of performing a random movement
+    replay : ReplayBuffer or None
+        If it is set, the transitions of the game are stored in it
+    """
+    game = game_class()
+    state, turn = game.get_board(), game.get_turn()
+
+    action = player.random_movement(state)
+    n_state, _, reward, _ = game.step(action)
+    done = False
+    while not done:
+
+        action2 = player.movement(n_state, greedy)
+        n_state2, done, reward2, info = game.step(action2)
+        winner = info['winner']
+
+        if done:
+            q_value = (1-alpha)*player.get_qvalue(n_state, action2) + alpha*(reward2)
+            player.update_qvalue(q_value, n_state, action2)
+            if replay is not None:
+                replay.add(encode_state(n_state), action2, reward2, 0, True)
+
+            if winner != None:
+                reward2 = -reward2
+            q_value = (1-alpha)*player.get_qvalue(state, action) + alpha*(reward2)
+            player.update_qvalue(q_value, state, action)
+            if replay is not None:
+                replay.add(encode_state(state), action, reward2, 0, True)
+        else:
+
+            # Update Q
+            q_value = (1-alpha)*player.get_qvalue(state, action) + alpha*(reward2 + discount_factor*player.get_qvalue_max(n_state2))
+            player.update_qvalue(q_value, state, action)
+            if replay is not None:
+                replay.add(encode_state(state), action, reward2, encode_state(n_state2), False)
+
+            state = n_state
+            n_state = n_state2
+
+            action = action2
+
+            reward = reward2
+
+def train(player, iterations, game_class=TicTacToeCompact, alpha=Constants.ALPHA, discount_factor=Constants.DISCOUNT_FACTOR,
+        greedy=Constants.GREEDY, monitor=None, stopping=None, checkpointer=None, first_episode=0, replay=None):
+    """Trains the agent playing games against itself.
+
+    Params:
+    ----------
+    player : AgentQLearning
+        The agent to train
+    iterations : int
+        Number of games of training (maximum number if stopping is set)
+    game_class : class
+        The game engine to use (TicTacToe, TicTacToeBitboard or TicTacToeCompact)
+    alpha : float
+        The learning rate
+    discount_factor : float
+        The discount factor
+    greedy : float
+        The probability of performing a random movement
+    monitor : TrainingMonitor or None
+        If it is set, it measures the training (see TrainingMonitor)
+    stopping : EarlyStopping or None
+        If it is set, the training stops when the q table converges. It is checked with each record of the
+        monitor (a monitor with intervals of 1000 episodes is used if monitor is None)
+    checkpointer : Checkpointer or None
+        If it is set, it saves checkpoints of the training (see Checkpoint)
+    first_episode : int
+        Number of games already played (to continue a training from a checkpoint)
+    replay : ReplayBuffer or None
+        If it is set, the transitions are stored in it and a minibatch of them is applied again
+        every replay.interval games (see ReplayBuffer.replay)
+
+    Returns
+    -------
+    int
+        Number of games played (including first_episode)
+    """
+    if monitor is None and stopping is None and checkpointer is None:
+        for i in range(first_episode, iterations):
+            run_episode(player, game_class, alpha, discount_factor, greedy, replay)
+            if replay is not None and (i + 1) % replay.interval == 0:
+                replay.replay(player, alpha, discount_factor)
+        return max(first_episode, iterations)
+
+    if monitor is None and stopping is not None:
+        monitor = TrainingMonitor()
+    if stopping is not None and stopping.max_policy_change is not None:
+        monitor.track_policy = True
+    if monitor is not None:
+        episode_player = monitor.wrap_agent(player)
+        episode_game_class = monitor.wrap_game_class(game_class)
+    else:
+        episode_player, episode_game_class = player, game_class
+
+    for i in range(first_episode, iterations):
+        run_episode(episode_player, episode_game_class, alpha, discount_factor, greedy, replay)
+        if replay is not None and (i + 1) % replay.interval == 0:
+            replay.replay(player, alpha, discount_factor)
+        if checkpointer is not None:
+            checkpointer.episode_finished(i + 1, player)
+        if monitor is not None:
+            record = monitor.episode_finished(i + 1, player)
+            if record is not None and stopping is not None and stopping.converged(record):
+                return i + 1
+    return max(first_episode, iterations)
@@ -0,0 +1,436 @@
+import json
+import random
+import time
+
+import Constants
+from QTable import decode_state, encode_state
+from Symmetry import canonicalize
+from TicTacToeBitboard import TicTacToeBitboard
+
+class TrainingMonitor:
+    """
+    Measures a training (see Training.train) and emits a record every interval episodes with:
+        - episode, seconds and episodes_per_second
+        - time_step, time_selection and time_update: seconds spent in the game, choosing movements and
+          updating the q table during the interval
+        - table_size and table_bytes: number of states and memory of the q table (for an AgentLinear,
+          None and the memory of its weights and replay buffer)
+        - updates, mean_abs_delta and max_abs_delta: changes of the q values during the interval
+        - win_rate, draw_rate and loss_rate: results of the greedy agent against a random player
+          (only if evaluation_games > 0)
+        - policy_change: fraction of the states updated so far whose greedy action has changed since
+          the last record (only if track_policy is True and the agent has a q table). The states are the
+          canonical ones for an agent with symmetries (see Symmetry), so an update counts for all the
+          symmetric boards. Only the states updated during the interval are checked again, because the
+          greedy action of the other states can not change (the updates of a ReplayBuffer are not tracked)
+
+    The records are written as JSON lines to log_file and/or passed to callback.
+    When Training.train has no monitor nothing is measured.
+    """
+
+    def __init__(self, interval=1000, log_file=None, callback=None, evaluation_games=0, track_policy=False, evaluation_seed=0):
+        """Initializes the monitor.
+
+        Params:
+        ----------
+        interval : int
+            Number of episodes between records
+        log_file : str or None
+            The file where appends the records (JSON lines)
+        callback : function or None
+            Function called with each record (dict)
+        evaluation_games : int
+            Number of games against a random player played at the end of each interval (0 to not evaluate)
+        track_policy : boolean
+            Indicates if the changes of the greedy actions are measured
+        evaluation_seed : int or None
+            The seed of the random player of the evaluation games (they do not use the random generator
+            of the training, so the evaluation does not change the training)
+        """
+        self.interval = interval
+        self.log_file = log_file
+        self.callback = callback
+        self.evaluation_games = evaluation_games
+        self.track_policy = track_policy
+        self.records = []
+        self._evaluation_rng = random.Random(evaluation_seed)
+        self._policy = {}   # Key: state (see _policy_state). Value: greedy action in the last record
+        self._updated_states = set()
+        self._start = None
+        self._game_class = TicTacToeBitboard
+        self._reset_interval()
+
+    def _reset_interval(self):
+        """Resets the measures of the interval."""
+        self.time_step = 0.0
+        self.time_selection = 0.0
+        self.time_update = 0.0
+        self.updates = 0
+        self.sum_abs_delta = 0.0
+        self.max_abs_delta = 0.0
+        self._updated_states.clear()
+        self._interval_start = time.perf_counter()
+
+    def wrap_agent(self, player):
+        """Gets an agent that measures the calls to the agent (see TimedAgent)."""
+        if self._start is None:
+            self._start = time.perf_counter()
+            self._interval_start = self._start
+        return TimedAgent(player, self)
+
+    def wrap_game_class(self, game_class):
+        """Gets a function that creates games that measure their steps (see TimedGame).
+        The evaluation games are played with the same game class."""
+        self._game_class = game_class
+        return lambda: TimedGame(game_class(), self)
+
+    def episode_finished(self, episode, player):
+        """Emits a record if the episode is the last one of an interval.
+
+        Params:
+        ----------
+        episode : int
+            Number of episodes played
+        player : AgentQLearning
+            The agent that is training
+
+        Returns
+        -------
+        dict or None
+            The record (None if it is not the end of an interval)
+        """
+        if episode % self.interval != 0:
+            return None
+        table = getattr(player, 'Q_table', None)    # An AgentLinear has no q table
+        now = time.perf_counter()
+        elapsed = now - self._interval_start
+        record = {
+            'episode': episode,
+            'seconds': round(now - self._start, 3),
+            'episodes_per_second': round(self.interval/elapsed, 1) if elapsed > 0 else None,
+            'time_step': round(self.time_step, 4),
+            'time_selection': round(self.time_selection, 4),
+            'time_update': round(self.time_update, 4),
+            'table_size': len(table) if table is not None else None,
+            'table_bytes': table.memory_usage() if table is not None else player.memory_usage(),
+            'updates': self.updates,
+            'mean_abs_delta': self.sum_abs_delta/self.updates if self.updates else 0.0,
+            'max_abs_delta': self.max_abs_delta,
+        }
+        if self.evaluation_games:
+            record.update(evaluate(player, self.evaluation_games, self._game_class, self._evaluation_rng))
+        if self.track_policy and table is not None:
+            record['policy_change'] = self._policy_change(player)
+        self.emit(record)
+        self._reset_interval()
+        return record
+
+    def _policy_change(self, player):
+        """Gets the fraction of the states whose greedy action has changed since the last call
+        (only the states updated since the last call are checked). The greedy actions are got with
+        get_best_action_value, so the random generator of the training is not used."""
+        policy = self._policy
+        changed = 0
+        num_cells = player.Q_table.num_actions
+        for state in self._updated_states:
+            action, _ = player.get_best_action_value(decode_state(state, num_cells))
+            if policy.get(state) != action:
+                policy[state] = action
+                changed += 1
+        return changed/len(policy) if policy else 0.0
+
+    @staticmethod
+    def _policy_state(player, board):
+        """Gets the state of a board whose greedy action is tracked (see _policy_change).
+
+        Params:
+        ----------
+        player : AgentQLearning
+            The agent
+        board : list of int
+            The board
+
+        Returns
+        -------
+        int
+            The canonical state if the agent has symmetries, the encoded board in other case
+        """
+        if getattr(player, 'symmetric', False):
+            return canonicalize(board)[0]
+        return encode_state(board)
+
+    def emit(self, record):
+        """Stores a record, writes it to the log file and passes it to the callback."""
+        self.records.append(record)
+        if self.log_file:
+            with open(self.log_file, 'a') as handle:
+                handle.write(json.dumps(record) + '\n')
+        if self.callback:
+            self.callback(record)
+
+class TimedAgent:
+    """An agent that measures the time of the calls to another agent and the changes of its q values."""
+
+    def __init__(self, player, monitor):
+        """Initializes the wrapper.
+
+        Params:
+        ----------
+        player : AgentQLearning or AgentLinear
+            The agent that is measured
+        monitor : TrainingMonitor
+            The monitor that accumulates the measures
+        """
+        self.player = player
+        self.monitor = monitor
+
+    def movement(self, board, greedy=0):
+        """Performs a movement (see AgentQLearning.movement) and measures its time.
+
+        Params:
+        ----------
+        board : list of int
+            The current board
+        greedy : float
+            The probability of performing a random movement
+
+        Returns
+        -------
+        int
+            The position on the board
+        """
+        start = time.perf_counter()
+        action = self.player.movement(board, greedy)
+        self.monitor.time_selection += time.perf_counter() - start
+        return action
+
+    def random_movement(self, board):
+        """Performs a random movement (see AgentQLearning.random_movement) and measures its time.
+
+        Params:
+        ----------
+        board : list of int
+            The current board
+
+        Returns
+        -------
+        int
+            The position on the board
+        """
+        start = time.perf_counter()
+        action = self.player.random_movement(board)
+        self.monitor.time_selection += time.perf_counter() - start
+        return action
+
+    def get_qvalue(self, board, action):
+        """Gets a q value (see AgentQLearning.get_qvalue) and measures its time.
+
+        Params:
+        ----------
+        board : list of int
+            The board
+        action : int
+            The action
+
+        Returns
+        -------
+        float
+            The q value
+        """
+        start = time.perf_counter()
+        value = self.player.get_qvalue(board, action)
+        self.monitor.time_update += time.perf_counter() - start
+        return value
+
+    def get_qvalue_max(self, board):
+        """Gets the maximum q value of a board (see AgentQLearning.get_qvalue_max) and measures its time.
+
+        Params:
+        ----------
+        board : list of int
+            The board
+
+        Returns
+        -------
+        float
+            The maximum q value of the free positions
+        """
+        start = time.perf_counter()
+        value = self.player.get_qvalue_max(board)
+        self.monitor.time_update += time.perf_counter() - start
+        return value
+
+    def update_qvalue(self, value, board, action):
+        """Updates a q value (see AgentQLearning.update_qvalue) and measures its time and its change.
+
+        Params:
+        ----------
+        value : float
+            The new q value
+        board : list of int
+            The board
+        action : int
+            The action
+        """
+        start = time.perf_counter()
+        delta = abs(value - self.player.get_qvalue(board, action))
+        self.player.update_qvalue(value, board, action)
+        monitor = self.monitor
+        if monitor.track_policy:
+            monitor._updated_states.add(monitor._policy_state(self.player, board))
+        monitor.time_update += time.perf_counter() - start
+        monitor.updates += 1
+        monitor.sum_abs_delta += delta
+        if delta > monitor.max_abs_delta:
+            monitor.max_abs_delta = delta
+
+class TimedGame:
+    """A game that measures the time of its steps."""
+
+    def __init__(self, game, monitor):
+        """Initializes the wrapper.
+
+        Params:
+        ----------
+        game : TicTacToe
+            The game that is measured (any engine)
+        monitor : TrainingMonitor
+            The monitor that accumulates the measures
+        """
+        self.game = game
+        self.monitor = monitor
+
+    def get_board(self):
+        """Get the board (see TicTacToe.get_board).
+
+        Returns
+        -------
+        list of int
+            The board of the game
+        """
+        return self.game.get_board()
+
+    def get_turn(self):
+        """Get turn (see TicTacToe.get_turn).
+
+        Returns
+        -------
+        boolean
+            Indicates if it is the player1 turn or not
+        """
+        return self.game.get_turn()
+
+    def step(self, action):
+        """Performs a movement (see TicTacToe.step) and measures its time.
+
+        Params:
+        ----------
+        action : int
+            The position to move
+
+        Returns
+        -------
+        tuple
+            The result of the step of the game (board, done, reward, info)
+        """
+        start = time.perf_counter()
+        result = self.game.step(action)
+        self.monitor.time_step += time.perf_counter() - start
+        return result
+
+def evaluate(player, games, game_class=TicTacToeBitboard, rng=None):
+    """Plays the greedy agent against a random player. The agent plays with X in the even games.
+    The random generator of the training is not used, so an evaluation does not change the training.
+
+    Params:
+    ----------
+    player : AgentQLearning
+        The agent
+    games : int
+        Number of games
+    game_class : class
+        The game engine to use
+    rng : random.Random or None
+        The generator of the movements of the random player and of the agent on boards it has not visited
+        (a new generator with seed 0 if it is None)
+
+    Returns
+    -------
+    dict
+        win_rate, draw_rate and loss_rate of the agent
+    """
+    if rng is None:
+        rng = random.Random(0)
+    wins = draws = 0
+    for game_number in range(games):
+        game = game_class()
+        board = game.get_board()
+        player_x = game_number % 2 == 0
+        done = False
+        while not done:
+            action = None
+            if game.get_turn() == player_x:
+                action, _ = player.get_best_action_value(board)
+            if action is None:
+                action = rng.choice([pos for pos, value in enumerate(board) if value == Constants.EMPTY])
+            board, done, reward, info = game.step(action)
+        winner = info['winner']
+        if winner is None:
+            draws += 1
+        elif (winner == 1) == player_x:
+            wins += 1
+    return {'win_rate': wins/games, 'draw_rate': draws/games, 'loss_rate': (games - wins - draws)/games}
+
+class EarlyStopping:
+    """
+    Stops a training (see Training.train) when the q table has converged: the last window records of the
+    monitor meet every threshold that is set.
+    """
+
+    def __init__(self, max_policy_change=0.05, max_abs_delta=None, mean_abs_delta=None, window=3, min_win_rate=None):
+        """Initializes the criteria.
+
+        Params:
+        ----------
+        max_policy_change : float or None
+            Maximum fraction of states whose greedy action changes in an interval (None to not check it)
+        max_abs_delta : float or None
+            Maximum change of a q value in an interval (None to not check it)
+        mean_abs_delta : float or None
+            Maximum mean change of the q values in an interval (None to not check it)
+        window : int
+            Number of consecutive intervals that must meet the thresholds
+        min_win_rate : float or None
+            Minimum win rate against a random player (None to not check it). It needs a monitor with evaluation games
+        """
+        self.max_policy_change = max_policy_change
+        self.max_abs_delta = max_abs_delta
+        self.mean_abs_delta = mean_abs_delta
+        self.window = window
+        self.min_win_rate = min_win_rate
+        self.converged_intervals = 0
+
+    def converged(self, record):
+        """Checks if the training has converged with a new record of the monitor.
+
+        Params:
+        ----------
+        record : dict
+            The record (see TrainingMonitor)
+
+        Returns
+        -------
+        boolean
+            True if the training should stop
+        """
+        ok = True
+        if self.max_policy_change is not None and record.get('policy_change', 1.0) > self.max_policy_change:
+            ok = False
+        if self.max_abs_delta is not None and record['max_abs_delta'] > self.max_abs_delta:
+            ok = False
+        if self.mean_abs_delta is not None and record['mean_abs_delta'] > self.mean_abs_delta:
+            ok = False
+        if self.min_win_rate is not None and record.get('win_rate', 0.0) < self.min_win_rate:
+            ok = False
+        self.converged_intervals = self.converged_intervals + 1 if ok else 0
+        return self.converged_intervals >= self.window